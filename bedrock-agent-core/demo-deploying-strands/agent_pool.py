@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class PooledAgent:
+    """An agent owned by one session, plus the lock that serializes its turns."""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # Requests running a turn on the agent or waiting for its lock; busy agents are never evicted
+        self.users = 0
+
+
+class AgentPool:
+    """
+    Hand every runtime session its own lazily built Agent.
+
+    Agents are created on first use by `agent_factory()` and kept in LRU order.
+    The pool holds at most `max_sessions` idle agents, and agents idle for
+    longer than `idle_ttl` seconds (counted from the end of their last turn)
+    are dropped the next time the pool is touched. An agent with a turn
+    running or waiting is never dropped, so a session never gets a second
+    agent while its first one is still in use.
+    The factory should reuse the shared model and tool objects so that a new
+    session only costs a fresh conversation history.
+
+    History compaction that the agent's conversation manager deferred (see
+    `TokenBudgetConversationManager(defer_compaction=True)`) runs right after
+    the turn, still holding the session's lock; streamed turns run it on a
+    worker thread, so a summary request never blocks the event loop.
+    """
+
+    def __init__(self, agent_factory, max_sessions=100, idle_ttl=900):
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._agents = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, session_id):
+        """Return the PooledAgent for `session_id`, building it if needed."""
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+
+            pooled = self._agents.get(session_id)
+            if pooled is None:
+                pooled = PooledAgent(self.agent_factory())
+                self._agents[session_id] = pooled
+                self._evict_overflow()
+            else:
+                self._agents.move_to_end(session_id)
+
+            pooled.last_used = now
+            return pooled
+
+    def peek(self, session_id):
+        """Return the session's PooledAgent if it is pooled, without building one or changing the LRU order."""
+        with self._lock:
+            return self._agents.get(session_id)
+
+    def _checkout(self, session_id):
+        """get() for a turn: the agent stays in the pool until the matching _checkin()."""
+        with self._lock:
+            pooled = self.get(session_id)
+            pooled.users += 1
+            return pooled
+
+    def _checkin(self, session_id, pooled):
+        with self._lock:
+            pooled.users -= 1
+            pooled.last_used = time.monotonic()
+            if self._agents.get(session_id) is pooled:
+                self._agents.move_to_end(session_id)
+            self._evict_overflow()
+
+    def invoke(self, session_id, *args, **kwargs):
+        """Run one turn on the session's agent; turns of one session never overlap."""
+        pooled = self._checkout(session_id)
+        try:
+            with pooled.lock:
+                result = pooled.agent(*args, **kwargs)
+                self._compact(pooled.agent)
+                return result
+        finally:
+            self._checkin(session_id, pooled)
+
+    async def stream(self, session_id, *args, **kwargs):
+        """Async variant of invoke() that yields the agent's stream events as they arrive."""
+        pooled = self._checkout(session_id)
+        try:
+            await self._acquire_async(pooled.lock)
+            try:
+                async for event in pooled.agent.stream_async(*args, **kwargs):
+                    yield event
+            except BaseException:
+                pooled.lock.release()
+                raise
+            await self._compact_and_release(pooled)
+        finally:
+            self._checkin(session_id, pooled)
+
+    @staticmethod
+    async def _acquire_async(lock):
+        """Wait for the session's previous turn without blocking the event loop."""
+        acquire = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The worker thread cannot be stopped and still takes the lock, so hand it back once it does
+            acquire.add_done_callback(lambda _: lock.release())
+            raise
+
+    @staticmethod
+    def _compact(agent):
+        compact_pending = getattr(agent.conversation_manager, "compact_pending", None)
+        if compact_pending is not None:
+            compact_pending(agent)
+
+    @classmethod
+    async def _compact_and_release(cls, pooled):
+        """Run the deferred compaction on a worker thread, then release the session's lock."""
+
+        def run():
+            try:
+                cls._compact(pooled.agent)
+            finally:
+                pooled.lock.release()
+
+        # If the request is cancelled meanwhile, the thread still finishes the compaction and releases the lock
+        await asyncio.shield(asyncio.to_thread(run))
+
+    def evict(self, session_id):
+        """Drop a session's agent, e.g. when the session has ended."""
+        with self._lock:
+            return self._agents.pop(session_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            agents = [pooled.agent for pooled in self._agents.values()]
+            stats = {
+                "sessions": len(self._agents),
+                "max_sessions": self.max_sessions,
+                "idle_ttl": self.idle_ttl,
+            }
+        # Retained history of every session, when the agents' conversation managers report it
+        history = [
+            agent.conversation_manager.stats()
+            for agent in agents
+            if callable(getattr(getattr(agent, "conversation_manager", None), "stats", None))
+        ]
+        if history:
+            stats["history_tokens"] = sum(h["retained_tokens"] for h in history)
+            stats["max_history_tokens"] = max(h["retained_tokens"] for h in history)
+            stats["history_messages"] = sum(h["retained_messages"] for h in history)
+            stats["compactions"] = sum(h["compactions"] for h in history)
+        return stats
+
+    def _evict_idle(self, now):
+        if not self.idle_ttl:
+            return
+        # Agents are in order of last use; busy ones keep their place until their turn ends
+        for session_id, pooled in list(self._agents.items()):
+            if pooled.users:
+                continue
+            if now - pooled.last_used < self.idle_ttl:
+                break
+            del self._agents[session_id]
+
+    def _evict_overflow(self):
+        """Drop the least recently used idle agents while the pool holds more than max_sessions."""
+        excess = len(self._agents) - self.max_sessions
+        if excess <= 0:
+            return
+        for session_id in [sid for sid, pooled in self._agents.items() if not pooled.users][:excess]:
+            del self._agents[session_id]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._agents)
@@ -1,16 +1,49 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
-os.environ["STRANDS_OTEL_ENABLE_CONSOLE_EXPORT"] = "true"
+# Span dumps to stdout are opt-in (STRANDS_OTEL_ENABLE_CONSOLE_EXPORT=true); latency histograms are
+# exported by instrumentation.py instead (METRICS_PORT, METRICS_FILE, PROFILE_SLOW_SECONDS)
 os.environ["BYPASS_TOOL_CONSENT"]="true"
 
 from strands import Agent
+from strands.handlers.callback_handler import PrintingCallbackHandler
 from strands.models import BedrockModel
 from strands_tools import file_read, file_write, speak
 from bedrock_agentcore import BedrockAgentCoreApp
 
+from agent_pool import AgentPool
+from conversation_memory import TokenBudgetConversationManager
+from instrumentation import agent_hooks, configure_from_env
+from prompt_cache import CacheUsage, cache_options
+
+# Pool and concurrency settings (override via environment variables)
+MAX_SESSIONS = int(os.getenv("AGENT_POOL_MAX_SESSIONS", "100"))
+SESSION_IDLE_TTL = float(os.getenv("AGENT_POOL_IDLE_TTL", "900"))
+MAX_CONCURRENT_INVOCATIONS = int(os.getenv("AGENT_MAX_CONCURRENT_INVOCATIONS", "8"))
+DEFAULT_SESSION_ID = "default"
+
+# Conversation history resent per turn; older turns are folded into a running summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "16000"))
+
+# Bedrock cache point type for the static prefix (tool specs and system prompt); "off" disables caching
+PROMPT_CACHE = os.getenv("AGENT_PROMPT_CACHE", "default")
+
+configure_from_env()
+metrics_hooks = agent_hooks()
+
 # Step 1: Define the app 
 app = BedrockAgentCoreApp()
 
+# Allow more than the default two invocations to run at the same time. BedrockAgentCoreApp has no public
+# setting for this, so its private executor and semaphore are replaced; requirements.txt pins the version
+# they were checked against (test_agentcore_app.py)
+app._invocation_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_INVOCATIONS,
+    thread_name_prefix="invocation",
+)
+app._invocation_semaphore = asyncio.Semaphore(MAX_CONCURRENT_INVOCATIONS)
+
 # Step 2: Define the system prompt
 system_prompt = """
 You are a helpful personal assistant capable of performing local file actions and simple tasks for the user.
@@ -28,7 +61,7 @@ You can use the following tools to perform these actions:
 - 'speak': Speak a message to the user.
 """
 
-# Step 3: Define the agent
+# Step 3: Define the model and tools shared by every session
 model_id = BedrockModel(
     model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
     max_tokens=64000,
@@ -37,27 +70,87 @@ model_id = BedrockModel(
             "type":"disabled",
         }
     },
+    **cache_options(PROMPT_CACHE),
 )
 
-agent = Agent(
-    model=model_id,
-    system_prompt=system_prompt,
-    tools=[
-        file_read,
-        file_write,
-        speak,
-    ],
+tools = [
+    file_read,
+    file_write,
+    speak,
+]
+
+# Token usage (including prompt cache reads and writes) over all sessions
+cache_usage = CacheUsage()
+
+def create_agent():
+    """Build a fresh agent for a new session on top of the shared model and tools"""
+    return Agent(
+        model=model_id,
+        system_prompt=system_prompt,
+        tools=tools,
+        # Summaries are written by the pool after the turn, off the server's event loop
+        conversation_manager=TokenBudgetConversationManager(max_tokens=HISTORY_TOKEN_BUDGET, defer_compaction=True),
+        callback_handler=CacheUsage(PrintingCallbackHandler(), parent=cache_usage),
+        hooks=[metrics_hooks],
+    )
+
+# Step 4: Keep one agent per runtime session
+agent_pool = AgentPool(
+    create_agent,
+    max_sessions=MAX_SESSIONS,
+    idle_ttl=SESSION_IDLE_TTL,
 )
 
-# Step 4: Run the agent
+# The stats only look at a pooled agent: a session evicted since its turn reports nothing
+# rather than having a new agent built for it
+def history_stats(session_id):
+    """Size of the history the session's agent will resend on its next turn"""
+    pooled = agent_pool.peek(session_id)
+    return pooled.agent.conversation_manager.stats() if pooled else {}
+
+def usage_stats(session_id):
+    """Token usage of the session so far, split into uncached input and prompt cache reads and writes"""
+    pooled = agent_pool.peek(session_id)
+    return pooled.agent.callback_handler.stats() if pooled else {}
+
+# Step 5: Stream partial text and tool calls while the agent runs
+async def stream_response(session_id, user_message):
+    """Yield server-sent events for one turn: text, tool calls, the same result as the sync path, then the history size and token usage"""
+    announced_tools = set()
+
+    # The entrypoint returns this generator at once, releasing its invocation slot before the turn runs,
+    # so streamed turns take a slot of their own here and wait for one when all are busy
+    async with app._invocation_semaphore:
+        async for event in agent_pool.stream(session_id, user_message):
+            if "data" in event:
+                yield {"type": "text", "data": event["data"]}
+            elif "current_tool_use" in event:
+                tool_use = event["current_tool_use"]
+                tool_use_id = tool_use.get("toolUseId")
+                if tool_use_id and tool_use_id not in announced_tools:
+                    announced_tools.add(tool_use_id)
+                    yield {"type": "tool_use", "tool_use_id": tool_use_id, "name": tool_use.get("name")}
+            elif "result" in event:
+                yield {"type": "result", "result": event["result"].message}
+
+    # The history is compacted once the turn has finished
+    yield {"type": "history", "history": history_stats(session_id)}
+    yield {"type": "usage", "usage": usage_stats(session_id)}
+
+# Step 6: Run the agent
 @app.entrypoint
-def invoke(payload):
-    """Process user input and return a response"""
+def invoke(payload, context):
+    """Process user input and return a response, streamed if the payload asks for it"""
     
     user_message = payload.get("prompt", "Hello")
-    result = agent(user_message)
+    session_id = context.session_id or DEFAULT_SESSION_ID
+
+    if payload.get("stream", False):
+        return stream_response(session_id, user_message)
+
+    result = agent_pool.invoke(session_id, user_message)
     
-    return {"result": result.message}
+    return {"result": result.message, "history": history_stats(session_id), "usage": usage_stats(session_id)}
 
 if __name__ == "__main__":
     app.run()
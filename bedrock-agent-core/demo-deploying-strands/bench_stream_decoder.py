@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for stream_decoder against the old buffer-then-parse approach.
+
+Builds a synthetic multi-megabyte `text/event-stream` body shaped like the
+AgentCore streaming entrypoint output and reports, for both parsers, the total
+time, the time until the first text delta is available, and the peak memory
+allocated while parsing.
+
+    python bench_stream_decoder.py --size-mb 16 --chunk-size 65536
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from stream_decoder import iter_text
+
+
+def build_stream(size_mb, delta_size=48):
+    """Return the SSE body as a list of events' bytes, roughly `size_mb` in total."""
+    delta = "lorem ipsum dolor sit amet " * (delta_size // 27 + 1)
+    delta = delta[:delta_size]
+    event = f"data: {json.dumps({'type': 'text', 'data': delta})}\n\n".encode("utf-8")
+    count = max(1, size_mb * 1024 * 1024 // len(event))
+    final = f"data: {json.dumps({'type': 'result', 'result': {'role': 'assistant', 'content': [{'text': delta * count}]}})}\n\n"
+    return event * count + final.encode("utf-8")
+
+
+def chunked(body, chunk_size):
+    for i in range(0, len(body), chunk_size):
+        yield body[i : i + chunk_size]
+
+
+def legacy_parse(chunks):
+    """The previous process_output logic: collect every data line, parse at the end."""
+    buffer = b"".join(chunks)
+    content = []
+    for line in buffer.splitlines():
+        if line:
+            line = line.decode("utf-8")
+            if line.startswith("data: "):
+                content.append(line[6:])
+    text_output = ""
+    parsed = [json.loads(c) for c in content]
+    first = time.perf_counter()
+    for part in parsed:
+        result = part.get("result", {})
+        if isinstance(result, dict):
+            for c in result.get("content", []):
+                text_output += c.get("text", "")
+    return text_output, first
+
+
+def streaming_parse(chunks):
+    pieces = []
+    first = None
+    for delta in iter_text({"contentType": "text/event-stream", "response": chunks}):
+        if first is None:
+            first = time.perf_counter()
+        pieces.append(delta)
+    return "".join(pieces), first
+
+
+def run(name, parser, body, chunk_size):
+    # Time without tracing, then measure the peak in a second, traced pass
+    start = time.perf_counter()
+    text, first = parser(chunked(body, chunk_size))
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    parser(chunked(body, chunk_size))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<10} total {total * 1000:8.1f} ms | first text {(first - start) * 1000:8.2f} ms | "
+        f"peak parser memory {peak / 1024 / 1024:7.1f} MiB | {len(text):,} chars"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=16, help="Approximate size of the event stream")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Bytes per network chunk")
+    args = parser.parse_args()
+
+    body = build_stream(args.size_mb)
+    print(f"Stream: {len(body) / 1024 / 1024:.1f} MiB in {args.chunk_size}-byte chunks\n")
+    run("legacy", legacy_parse, body, args.chunk_size)
+    run("streaming", streaming_parse, body, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Concurrent client for an AgentCore runtime, and a load generator built on it.
+
+`RuntimeClient` sends prompts to a deployed runtime (through a pooled boto3
+client) or to the local `app.py` server (POST /invocations on port 8080).
+Throttled and busy responses are retried with full-jitter exponential
+backoff. `open()` returns the raw response for `utills.process_output`, and
+`invoke()` reads it with `stream_decoder.iter_text` and times it.
+
+The CLI replays a prompt file (one prompt per line) over many sessions at
+once and reports throughput and latency percentiles:
+
+    python runtime_client.py prompts.txt --arn arn:aws:bedrock-agentcore:... -c 16
+    python runtime_client.py prompts.txt --local -c 8 --repeat 5    # after `python app.py`
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from instrumentation import percentile
+from stream_decoder import DEFAULT_CHUNK_SIZE, iter_text
+
+DEFAULT_LOCAL_URL = "http://localhost:8080/invocations"
+SESSION_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"
+
+# Errors that mean "try again later" rather than "this request is wrong"
+RETRYABLE_CODES = {
+    "ThrottlingException",
+    "ServiceQuotaExceededException",
+    "RetryableConflictException",
+    "InternalServerException",
+}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """A local runtime answered with a busy or throttled status"""
+
+
+def is_retryable(error):
+    """Whether a failed invoke call can be sent again"""
+    from botocore.exceptions import ClientError, ConnectionClosedError, EndpointConnectionError
+    from urllib3.exceptions import NewConnectionError, ProtocolError
+
+    connection_errors = (ConnectionClosedError, EndpointConnectionError, NewConnectionError, ProtocolError)
+    if isinstance(error, (RetryableError, *connection_errors)):
+        return True
+    if isinstance(error, ClientError):
+        response = error.response
+        return (
+            response.get("Error", {}).get("Code") in RETRYABLE_CODES
+            or response.get("ResponseMetadata", {}).get("HTTPStatusCode") in RETRYABLE_STATUS
+        )
+    return False
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Full-jitter backoff: a random wait up to base_delay * 2**attempt, capped at max_delay"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class RuntimeTarget:
+    """A deployed runtime, reached through one boto3 client whose connection pool is shared by all threads"""
+
+    def __init__(self, arn, qualifier="DEFAULT", region=None, max_pool_connections=50, read_timeout=900):
+        import boto3
+        from botocore.config import Config
+
+        self.arn = arn
+        self.qualifier = qualifier
+        self.client = boto3.client(
+            "bedrock-agentcore",
+            region_name=region,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                connect_timeout=10,
+                read_timeout=read_timeout,
+                tcp_keepalive=True,
+                # Retries are done by RuntimeClient, with jitter and its own counters
+                retries={"mode": "standard", "total_max_attempts": 1},
+            ),
+        )
+
+    def send(self, payload, session_id):
+        return self.client.invoke_agent_runtime(
+            agentRuntimeArn=self.arn,
+            qualifier=self.qualifier,
+            runtimeSessionId=session_id,
+            payload=payload,
+        )
+
+
+class LocalTarget:
+    """The app served locally by `app.run()`, reached through a keep-alive urllib3 pool"""
+
+    def __init__(self, url=DEFAULT_LOCAL_URL, max_pool_connections=50, read_timeout=900):
+        import urllib3
+
+        self.url = url
+        self.http = urllib3.PoolManager(
+            maxsize=max_pool_connections,
+            block=True,
+            timeout=urllib3.Timeout(connect=10, read=read_timeout),
+            retries=False,
+        )
+
+    def send(self, payload, session_id):
+        response = self.http.request(
+            "POST",
+            self.url,
+            body=payload,
+            headers={"Content-Type": "application/json", SESSION_HEADER: session_id},
+            preload_content=False,
+        )
+        if response.status >= 400:
+            body = response.read()
+            response.release_conn()
+            message = f"HTTP {response.status}: {body[:200].decode('utf-8', errors='replace')}"
+            if response.status in RETRYABLE_STATUS:
+                raise RetryableError(message)
+            raise RuntimeError(message)
+        # Same shape as an invoke_agent_runtime response, so iter_text and process_output accept it
+        return {
+            "contentType": response.headers.get("Content-Type", ""),
+            "statusCode": response.status,
+            "response": _release_after(response),
+        }
+
+
+def _release_after(response):
+    """Stream the body, then hand the connection back to the pool"""
+    try:
+        yield from response.stream(DEFAULT_CHUNK_SIZE)
+    finally:
+        response.release_conn()
+
+
+@dataclass
+class Invocation:
+    """One completed invocation, as measured by RuntimeClient.invoke"""
+
+    session_id: str
+    text: str
+    seconds: float
+    first_text_seconds: float
+    attempts: int
+
+
+class RuntimeClient:
+    """
+    Thread-safe client sending prompts to a RuntimeTarget or LocalTarget.
+
+    Calls that fail with a throttling, busy or connection error are sent again
+    up to `max_attempts` times in total, after a full-jitter backoff, so many
+    clients backing off at once do not retry in lockstep. Retries only cover
+    sending the request: once a response is returned, its body is read as is.
+    """
+
+    def __init__(self, target, stream=True, max_attempts=6, base_delay=0.2, max_delay=10.0):
+        self.target = target
+        self.stream = stream
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id(prefix="session"):
+        # AgentCore requires session ids of at least 33 characters
+        return f"{prefix}-{uuid.uuid4()}"
+
+    def _send(self, prompt, session_id):
+        payload = json.dumps({"prompt": prompt, "stream": self.stream}).encode()
+        for attempt in range(self.max_attempts):
+            try:
+                return self.target.send(payload, session_id), attempt + 1
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not is_retryable(e):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                time.sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+
+    def open(self, prompt, session_id):
+        """Send a prompt and return the response unread, e.g. for `process_output`"""
+        response, _ = self._send(prompt, session_id)
+        return response
+
+    def invoke(self, prompt, session_id, on_text=None):
+        """Send a prompt, read the answer as it streams in and return an Invocation"""
+        start = time.perf_counter()
+        response, attempts = self._send(prompt, session_id)
+        first = None
+        pieces = []
+        for delta in iter_text(response):
+            if first is None:
+                first = time.perf_counter()
+            if on_text:
+                on_text(delta)
+            pieces.append(delta)
+        end = time.perf_counter()
+        return Invocation(session_id, "".join(pieces), end - start, (first or end) - start, attempts)
+
+
+def replay(client, prompts, sessions=8, concurrency=8, repeat=1):
+    """
+    Send `prompts` (`repeat` times over) spread round-robin over `sessions` new
+    sessions, with up to `concurrency` sessions in flight. The prompts of one
+    session are sent in order, as a user chatting with the agent would.
+    Returns the load report as a dict.
+    """
+    work = list(prompts) * repeat
+    session_ids = [client.new_session_id("loadgen") for _ in range(sessions)]
+    queues = [work[i::sessions] for i in range(sessions)]
+    results = []
+    errors = []
+
+    def run_session(session_id, queue):
+        for prompt in queue:
+            try:
+                results.append(client.invoke(prompt, session_id))
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    retries_before = client.retries
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadgen") as executor:
+        list(executor.map(run_session, session_ids, queues))
+    seconds = time.perf_counter() - start
+
+    latencies = [r.seconds for r in results]
+    first_text = [r.first_text_seconds for r in results]
+    return {
+        "requests": len(work),
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "retries": client.retries - retries_before,
+        "seconds": round(seconds, 3),
+        "throughput": round(len(results) / seconds, 3) if seconds else 0.0,
+        "p50": round(percentile(latencies, 50), 4),
+        "p95": round(percentile(latencies, 95), 4),
+        "p99": round(percentile(latencies, 99), 4),
+        "max": round(max(latencies, default=0.0), 4),
+        "first_text_p50": round(percentile(first_text, 50), 4),
+        "first_text_p95": round(percentile(first_text, 95), 4),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def format_report(report):
+    lines = [
+        f"{report['requests']} requests over {report['sessions']} sessions, {report['concurrency']} in flight: "
+        f"{report['throughput']:.2f} req/s in {report['seconds']:.1f} s",
+        f"latency     p50 {report['p50']:.3f} s | p95 {report['p95']:.3f} s | p99 {report['p99']:.3f} s | max {report['max']:.3f} s",
+        f"first text  p50 {report['first_text_p50']:.3f} s | p95 {report['first_text_p95']:.3f} s",
+        f"errors {report['errors']} | retries {report['retries']}",
+    ]
+    if report["first_error"]:
+        lines.append(f"first error: {report['first_error']}")
+    return "\n".join(lines)
+
+
+def read_prompts(path):
+    """One prompt per line; blank lines and lines starting with # are skipped"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="File with one prompt per line")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--arn", help="Agent runtime ARN to invoke")
+    target.add_argument("--local", nargs="?", const=DEFAULT_LOCAL_URL, metavar="URL", help=f"Local app URL (default {DEFAULT_LOCAL_URL})")
+    parser.add_argument("--region", help="AWS region of the runtime")
+    parser.add_argument("--qualifier", default="DEFAULT", help="Runtime endpoint qualifier")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Sessions in flight")
+    parser.add_argument("--sessions", type=int, help="Sessions the prompts are spread over (default: --concurrency)")
+    parser.add_argument("--repeat", type=int, default=1, help="Times the prompt file is replayed")
+    parser.add_argument("--no-stream", action="store_true", help="Ask for one JSON response instead of server-sent events")
+    parser.add_argument("--max-attempts", type=int, default=6, help="Attempts per request on throttling or busy errors")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    prompts = read_prompts(args.prompts)
+    if not prompts:
+        parser.error(f"no prompts in {args.prompts}")
+    sessions = args.sessions or args.concurrency
+    # One pooled connection per thread, so no request waits for a socket
+    pool = max(10, args.concurrency)
+    if args.arn:
+        runtime = RuntimeTarget(args.arn, qualifier=args.qualifier, region=args.region, max_pool_connections=pool)
+    else:
+        runtime = LocalTarget(args.local, max_pool_connections=pool)
+    client = RuntimeClient(runtime, stream=not args.no_stream, max_attempts=args.max_attempts)
+
+    report = replay(client, prompts, sessions=sessions, concurrency=args.concurrency, repeat=args.repeat)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class SSEDecoder:
+    """
+    Incremental decoder for `text/event-stream` bodies.
+
+    Feed it raw byte chunks of any size; every event is returned as soon as its
+    terminating blank line has arrived, even if the event was split across
+    chunks. Only the unfinished tail of the stream is kept in memory.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._data_lines = []
+
+    def feed(self, chunk):
+        """Add a chunk of bytes and return the list of events it completed."""
+        if b"\n" not in chunk:
+            # Still inside one (possibly very long) line; keep the piece for later
+            if chunk:
+                self._pending.append(chunk)
+            return []
+
+        lines = chunk.split(b"\n")
+        if self._pending:
+            self._pending.append(lines[0])
+            lines[0] = b"".join(self._pending)
+        # The text after the last newline is an unfinished line (empty when the chunk ends in "\n")
+        tail = lines.pop()
+        self._pending = [tail] if tail else []
+
+        events = []
+        for line in lines:
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self):
+        """Return whatever event is still pending once the stream has ended."""
+        events = []
+        if self._pending:
+            line = b"".join(self._pending)
+            self._pending = []
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_line(self, line):
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if not line:
+            return self._dispatch()
+        if line.startswith(b"data:"):
+            value = line[5:]
+            if value.startswith(b" "):
+                value = value[1:]
+            self._data_lines.append(value)
+        # Comments, `event:`, `id:` and `retry:` fields carry nothing we render
+        return None
+
+    def _dispatch(self):
+        if not self._data_lines:
+            return None
+        data = b"\n".join(self._data_lines)
+        self._data_lines = []
+        try:
+            return json.loads(data)
+        except ValueError:
+            return data.decode("utf-8", errors="replace")
+
+
+def iter_sse_events(chunks):
+    """Yield decoded events from an iterable of byte chunks."""
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+def result_text(result):
+    """Concatenate the text blocks of an agent result message."""
+    if not isinstance(result, dict):
+        return ""
+    return "".join(c.get("text", "") for c in result.get("content", []) if isinstance(c, dict))
+
+
+def iter_response_chunks(body, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read a botocore StreamingBody (or any iterable of bytes) in large chunks."""
+    if hasattr(body, "iter_chunks"):
+        return body.iter_chunks(chunk_size=chunk_size)
+    return iter(body)
+
+
+def iter_text(response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the text of an `invoke_agent_runtime` response as it arrives.
+
+    Streaming responses yield one piece per text delta. A final `result`
+    event only contributes text when no deltas were seen, so runtimes that
+    send both never duplicate the answer. JSON responses yield their whole
+    text once the body has been read. An error event from the runtime is
+    raised as RuntimeError.
+    """
+    content_type = response.get("contentType", "")
+    body = response.get("response", [])
+
+    if "text/event-stream" in content_type:
+        seen_delta = False
+        for event in iter_sse_events(iter_response_chunks(body, chunk_size)):
+            if isinstance(event, str):
+                seen_delta = True
+                yield event
+            elif isinstance(event, dict):
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                if event.get("type") == "text" or isinstance(event.get("data"), str):
+                    seen_delta = True
+                    yield event.get("data", "")
+                elif "result" in event and not seen_delta:
+                    text = result_text(event["result"])
+                    if text:
+                        yield text
+
+    elif content_type == "application/json":
+        parsed = json.loads(b"".join(iter_response_chunks(body, chunk_size)))
+        if "error" in parsed:
+            raise RuntimeError(parsed["error"])
+        text = result_text(parsed.get("result", {}))
+        if text:
+            yield text
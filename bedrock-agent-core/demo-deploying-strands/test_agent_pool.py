@@ -0,0 +1,132 @@
+"""
+AgentPool tests against real strands Agents with an in-process model.
+
+    python -m pytest test_agent_pool.py
+"""
+import asyncio
+import time
+
+from strands import Agent
+from strands.models import Model
+
+from agent_pool import AgentPool
+from conversation_memory import TokenBudgetConversationManager
+
+SUMMARY_SECONDS = 0.5
+
+
+class ReplyModel(Model):
+    """Answers every turn at once with `words` words."""
+
+    def __init__(self, words=200):
+        self.config = {"words": words}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {"output": output_model()}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockDelta": {"delta": {"text": " ".join(["word"] * self.config["words"])}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def slow_summarizer(previous_summary, transcript):
+    # Stands in for the blocking Bedrock call of bedrock_summarizer
+    time.sleep(SUMMARY_SECONDS)
+    return "the user said hello"
+
+
+def create_agent(defer_compaction=True):
+    manager = TokenBudgetConversationManager(max_tokens=300, summarizer=slow_summarizer, defer_compaction=defer_compaction)
+    return Agent(model=ReplyModel(), conversation_manager=manager, callback_handler=None)
+
+
+async def stream_turns(pool, session_id, prompts):
+    for prompt in prompts:
+        async for _ in pool.stream(session_id, prompt):
+            pass
+
+
+async def max_loop_stall(work):
+    """Run `work` while a ticker measures the longest time the event loop was not available."""
+    stalls = []
+
+    async def tick():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(tick())
+    await work
+    ticker.cancel()
+    return max(stalls)
+
+
+def test_streamed_fold_does_not_block_the_event_loop():
+    pool = AgentPool(create_agent)
+    stall = asyncio.run(max_loop_stall(stream_turns(pool, "session", ["hello", "again", "and again"])))
+
+    manager = pool.get("session").agent.conversation_manager
+    assert manager.summary == "the user said hello"
+    assert manager.stats()["summary_seconds"] >= SUMMARY_SECONDS
+    assert stall < SUMMARY_SECONDS / 2
+
+
+def test_fold_inside_the_turn_blocks_the_event_loop():
+    # Without deferral the summary request runs inside stream_async, on the loop
+    pool = AgentPool(lambda: create_agent(defer_compaction=False))
+    stall = asyncio.run(max_loop_stall(stream_turns(pool, "session", ["hello", "again", "and again"])))
+
+    assert pool.get("session").agent.conversation_manager.summary == "the user said hello"
+    assert stall >= SUMMARY_SECONDS
+
+
+def test_invoke_runs_the_deferred_fold():
+    pool = AgentPool(create_agent)
+    for prompt in ["hello", "again", "and again"]:
+        pool.invoke("session", prompt)
+
+    manager = pool.get("session").agent.conversation_manager
+    assert manager.summary == "the user said hello"
+    assert manager.stats()["retained_tokens"] <= manager.max_tokens
+
+
+def test_cancelled_stream_releases_the_session_after_the_fold():
+    pool = AgentPool(create_agent)
+
+    async def run():
+        await stream_turns(pool, "session", ["hello", "again"])
+        task = asyncio.create_task(stream_turns(pool, "session", ["and again"]))
+        # Cancel while the deferred fold is running on its worker thread
+        await asyncio.sleep(SUMMARY_SECONDS / 2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    pooled = pool.get("session")
+    assert pooled.lock.acquire(timeout=SUMMARY_SECONDS * 2)
+    assert pooled.agent.conversation_manager.summary == "the user said hello"
+
+
+def test_peek_never_builds_or_reorders():
+    pool = AgentPool(create_agent, max_sessions=2)
+    assert pool.peek("missing") is None
+    assert len(pool) == 0
+
+    first = pool.get("first")
+    pool.get("second")
+    assert pool.peek("first") is first
+    # "first" is still the least recently used, so a third session evicts it
+    pool.get("third")
+    assert pool.peek("first") is None
+    assert pool.peek("second") is not None
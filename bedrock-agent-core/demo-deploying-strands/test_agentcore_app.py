@@ -0,0 +1,25 @@
+"""
+app.py raises the concurrency of BedrockAgentCoreApp by replacing private
+attributes; these tests fail if a bedrock-agentcore release renames them or
+stops using them for invocations.
+
+    python -m pytest test_agentcore_app.py
+"""
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from bedrock_agentcore import BedrockAgentCoreApp
+
+
+def test_invocation_limits_are_the_attributes_app_py_replaces():
+    app = BedrockAgentCoreApp()
+    assert isinstance(app._invocation_executor, ThreadPoolExecutor)
+    assert isinstance(app._invocation_semaphore, asyncio.Semaphore)
+
+
+def test_invocations_run_through_the_replaced_attributes():
+    # Looked up on self at call time, so the instances set by app.py are the ones used
+    source = inspect.getsource(BedrockAgentCoreApp._invoke_handler)
+    assert "self._invocation_semaphore" in source
+    assert "self._invocation_executor" in source
@@ -0,0 +1,23 @@
+"""
+The shared modules shipped with this demo must be identical to their source
+in `strands/`; run `python strands/sync_shared.py` to refresh them.
+
+    python -m pytest test_shared_modules.py
+"""
+import os
+import sys
+
+import pytest
+
+STRANDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "strands")
+
+if not os.path.exists(os.path.join(STRANDS_DIR, "sync_shared.py")):
+    pytest.skip("strands/ is not next to this demo", allow_module_level=True)
+
+sys.path.insert(0, STRANDS_DIR)
+from sync_shared import stale_copies
+
+
+def test_shared_modules_match_strands():
+    stale = [os.path.basename(copy) for _, copy in stale_copies()]
+    assert not stale, f"out of date, run `python strands/sync_shared.py`: {', '.join(stale)}"
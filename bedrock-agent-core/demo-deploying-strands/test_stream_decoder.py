@@ -0,0 +1,77 @@
+"""
+Split-point tests for stream_decoder: every way of cutting an event stream
+into chunks must decode to the same events as the unsplit stream.
+
+    python -m pytest test_stream_decoder.py
+"""
+import json
+
+import pytest
+
+from stream_decoder import SSEDecoder, iter_sse_events, iter_text
+
+STREAM = (
+    b'data: {"type": "text", "data": "Hello"}\r\n'
+    b"\r\n"
+    b": keep-alive comment\n"
+    b"event: message\n"
+    b'data: {"a":\n'
+    b"data: 1}\n"
+    b"\n"
+    b"data: plain text\n"
+    b"\n"
+    b'data: {"type": "text", "data": " world"}\n'
+    b"\n"
+)
+EXPECTED = [{"type": "text", "data": "Hello"}, {"a": 1}, "plain text", {"type": "text", "data": " world"}]
+
+
+def split_at(body, *points):
+    bounds = [0, *points, len(body)]
+    return [body[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def test_unsplit_stream():
+    assert list(iter_sse_events([STREAM])) == EXPECTED
+
+
+@pytest.mark.parametrize("point", range(1, len(STREAM)))
+def test_every_single_split_point(point):
+    assert list(iter_sse_events(split_at(STREAM, point))) == EXPECTED
+
+
+def test_byte_by_byte():
+    assert list(iter_sse_events(STREAM[i : i + 1] for i in range(len(STREAM)))) == EXPECTED
+
+
+def test_multiline_data_split_after_newline():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"a":\n') == []
+    assert decoder.feed(b"data: 1}\n\n") == [{"a": 1}]
+
+
+def test_split_between_cr_and_lf():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"b": 2}\r') == []
+    assert decoder.feed(b"\n\r") == []
+    assert decoder.feed(b"\n") == [{"b": 2}]
+
+
+def test_split_mid_line():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"c"') == []
+    assert decoder.feed(b": 3}\n") == []
+    assert decoder.feed(b"\n") == [{"c": 3}]
+
+
+def test_unterminated_event_is_flushed():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"d": 4}') == []
+    assert decoder.flush() == [{"d": 4}]
+
+
+def test_iter_text_prefers_deltas_over_result():
+    result = {"role": "assistant", "content": [{"text": "Hello world"}]}
+    body = STREAM + f"data: {json.dumps({'type': 'result', 'result': result})}\n\n".encode()
+    response = {"contentType": "text/event-stream", "response": split_at(body, 7, 50, 51)}
+    assert "".join(iter_text(response)) == "Hello" + "plain text" + " world"
@@ -1,6 +1,8 @@
 import ipywidgets as widgets
 from IPython.display import display, HTML, Markdown, display
-import json
+import time
+
+from stream_decoder import iter_text
 
 def select_agent_runtime(agent_runtimes):
     """
@@ -65,53 +67,50 @@ def select_agent_runtime(agent_runtimes):
     return selected_arn
 
 
-def process_output(response, chat_mode=False):
+def _render_output(text_output, chat_mode):
+    if chat_mode:
+        html_text = text_output.strip().replace('\n', '<br>')
+        return Markdown(
+            f"""<div style="background-color:#f0f8ff; padding:10px; border-radius:8px; border-left:4px solid #4682B4;">
+🤖 <strong>Bedrock AgentCore</strong>:<br><br>{html_text}
+</div>"""
+        )
+    return Markdown(f"### 🤖 Bedrock AgentCore Response\n{text_output.strip()}")
+
+
+def process_output(response, chat_mode=False, on_text=None, min_update_interval=0.1):
     """
     Process Bedrock Agent response and display only the text content in Markdown.
+
+    Text is rendered while the response is still arriving: events are decoded
+    incrementally by `stream_decoder.iter_text`, and the displayed Markdown is
+    refreshed at most every `min_update_interval` seconds. Pass `on_text` to
+    receive every text delta as well. Returns the full text.
     """
     text_output = ""
+    handle = None
+    last_update = 0.0
 
-    if "text/event-stream" in response.get("contentType", ""):
-        # Streaming response
-        content = []
-        for line in response["response"].iter_lines(chunk_size=10):
-            if line:
-                line = line.decode("utf-8")
-                if line.startswith("data: "):
-                    line = line[6:]
-                    content.append(line)
-        try:
-            parsed = [json.loads(c) for c in content]
-            for part in parsed:
-                result = part.get("result", {})
-                if isinstance(result, dict):
-                    for c in result.get("content", []):
-                        text_output += c.get("text", "")
-        except Exception as e:
-            print("⚠️ Failed to parse streaming content:", e)
-
-    elif response.get("contentType") == "application/json":
-        # JSON response
-        content = []
-        for chunk in response.get("response", []):
-            content.append(chunk.decode('utf-8'))
-        try:
-            parsed = json.loads(''.join(content))
-            result = parsed.get("result", {})
-            if isinstance(result, dict):
-                for c in result.get("content", []):
-                    text_output += c.get("text", "")
-        except Exception as e:
-            print("⚠️ Failed to parse JSON content:", e)
-
-    if text_output and chat_mode:
-        html_text = text_output.strip().replace('\n', '<br>')
-        display(Markdown(
-            f"""<div style="background-color:#f0f8ff; padding:10px; border-radius:8px; border-left:4px solid #4682B4;">
-🤖 <strong>Bedrock AgentCore</strong>:<br><br>{html_text}
-</div>"""
-        ))
+    try:
+        for delta in iter_text(response):
+            if on_text:
+                on_text(delta)
+            text_output += delta
+            now = time.monotonic()
+            if handle is None:
+                handle = display(_render_output(text_output, chat_mode), display_id=True)
+                last_update = now
+            elif now - last_update >= min_update_interval:
+                handle.update(_render_output(text_output, chat_mode))
+                last_update = now
+    except Exception as e:
+        print("⚠️ Failed to parse response content:", e)
+
+    if handle is not None:
+        handle.update(_render_output(text_output, chat_mode))
     elif text_output:
-        display(Markdown(f"### 🤖 Bedrock AgentCore Response\n{text_output.strip()}"))
+        display(_render_output(text_output, chat_mode))
     else:
-        print("⚠️ No text output found in the response.")
\ No newline at end of file
+        print("⚠️ No text output found in the response.")
+
+    return text_output
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the `manim` CLI, for benchmarking the render server offline.
+
+    fake_manim.py [flags] script.py [SceneName ...]
+
+Prints Manim-style "Animation N" lines and tqdm progress bars to stderr for
+`FAKE_MANIM_SECONDS` seconds (default 1.0) spread over
+`FAKE_MANIM_ANIMATIONS` animations (default 3), then writes
+`media/videos/<script>/480p15/<SceneName>.mp4` for every scene in the
+working directory.
+Set `FAKE_MANIM_FAIL=1` to exit with an error instead.
+"""
+import hashlib
+import os
+import sys
+import time
+
+
+def main(argv):
+    positional = [arg for arg in argv if not arg.startswith("-")]
+    scripts = [arg for arg in positional if arg.endswith(".py")]
+    if not scripts:
+        print("Error: no script given", file=sys.stderr)
+        return 2
+    script = scripts[0]
+    scenes = positional[positional.index(script) + 1 :] or ["Scene"]
+
+    seconds = float(os.getenv("FAKE_MANIM_SECONDS", "1.0"))
+    animations = max(1, int(os.getenv("FAKE_MANIM_ANIMATIONS", "3")))
+    steps = 10
+    for animation in range(animations):
+        for step in range(steps + 1):
+            percent = step * 100 // steps
+            bar = "#" * (step) + " " * (steps - step)
+            print(f"Animation {animation} : Create(Circle): {percent:3d}%|{bar}| {step}/{steps}", end="\r", file=sys.stderr, flush=True)
+            time.sleep(seconds / animations / (steps + 1))
+        print(file=sys.stderr)
+
+    if os.getenv("FAKE_MANIM_FAIL") == "1":
+        print("Error: rendering failed (FAKE_MANIM_FAIL=1)", file=sys.stderr)
+        return 1
+
+    with open(script, "rb") as f:
+        source = f.read()
+    stem = os.path.splitext(os.path.basename(script))[0]
+    output_dir = os.path.join("media", "videos", stem, "480p15")
+    os.makedirs(output_dir, exist_ok=True)
+    for scene in scenes:
+        digest = hashlib.sha256(source + scene.encode("utf-8")).digest()
+        video = os.path.join(output_dir, f"{scene}.mp4")
+        with open(video, "wb") as f:
+            f.write(digest * 4096)
+        print(f"File ready at '{os.path.abspath(video)}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,283 @@
+"""
+Deterministic stand-ins for the network and binaries the demos depend on.
+
+- `FakeModel`: a strands model provider that streams a deterministic answer
+  word by word after a configurable first-token latency, optionally calling
+  one tool first, and reports token usage like Bedrock does, including
+  prompt cache reads and writes when created with `cache_prompt`/`cache_tools`.
+  Structured output requests get a valid instance of the requested model
+- `FakeSynthesizer`: a Polly-like TTS callable for `speech.SpeechPipeline`
+- `fake_manim_command()`: an executable that behaves like the `manim` CLI
+  (see `fake_manim.py`)
+
+The same inputs always produce the same outputs, so runs are comparable.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import stat
+import sys
+import threading
+import time
+
+from strands.models import Model
+
+# Shared token estimate of the demos (strands/token_count.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "strands"))
+from token_count import estimate_tokens
+
+WORDS = (
+    "the model answers with a short deterministic reply about energy flow producers consumers "
+    "animation scene circle square transform summary chapter section page figure result value "
+    "first second third because therefore however which shows that each step of process"
+).split()
+
+
+def count_tokens(value):
+    """Estimated tokens of a string, or of any other value serialized as JSON"""
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return max(1, estimate_tokens(text))
+
+
+def _seed(*parts):
+    digest = hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _fake_value(schema, defs, rng):
+    """A value matching a JSON schema as generated by pydantic, drawn from `rng`"""
+    if "$ref" in schema:
+        return _fake_value(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, rng)
+    if "default" in schema:
+        return schema["default"]
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            # Optional fields get a value rather than None
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return _fake_value(options[0], defs, rng)
+
+    kind = schema.get("type", "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        if not properties and isinstance(schema.get("additionalProperties"), dict):
+            return {rng.choice(WORDS): _fake_value(schema["additionalProperties"], defs, rng)}
+        return {name: _fake_value(prop, defs, rng) for name, prop in properties.items()}
+    if kind == "array":
+        count = max(schema.get("minItems", 0), min(2, schema.get("maxItems", 2)))
+        return [_fake_value(schema.get("items", {}), defs, rng) for _ in range(count)]
+    if kind in ("integer", "number"):
+        step = 1 if kind == "integer" else 1e-6
+        low = schema.get("minimum", schema.get("exclusiveMinimum", -step) + step)
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 100 + step) - step)
+        return rng.randint(math.ceil(low), math.floor(high)) if kind == "integer" else rng.uniform(low, high)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "null":
+        return None
+    if schema.get("format") == "date-time":
+        return "2025-01-01T00:00:00Z"
+    if schema.get("format") == "date":
+        return "2025-01-01"
+    text = " ".join(rng.choice(WORDS) for _ in range(3)).ljust(schema.get("minLength", 0), "x")
+    return text[: schema.get("maxLength", len(text))]
+
+
+class FakeModel(Model):
+    """
+    Offline model provider for strands Agents.
+
+    Each call waits `first_token_latency` seconds, then streams
+    `response_tokens` words at `tokens_per_second`. With `tool_call=(name,
+    input)` (or a callable returning one from the messages), a turn that does
+    not yet have a tool result first asks for that tool, if the agent has it.
+
+    `cache_tools` and `cache_prompt` (the BedrockModel options) simulate
+    Bedrock prompt caching: the prefix up to a cache point (tool specs, then
+    the system prompt) is written to a cache shared by the model's calls once
+    it has `min_cache_tokens`, and read from it by later calls with the same
+    prefix within `cache_ttl` seconds. With `prefill_tokens_per_second`, the
+    first token also waits for every prompt token not read from the cache.
+
+    `structured_output` returns an instance of the requested pydantic model
+    whose fields are filled with values drawn from the prompt's seed.
+    """
+
+    def __init__(
+        self,
+        model_id="fake-model",
+        first_token_latency=0.2,
+        tokens_per_second=200.0,
+        response_tokens=60,
+        tool_call=None,
+        seed=0,
+        cache_tools=None,
+        cache_prompt=None,
+        min_cache_tokens=1024,
+        cache_ttl=300.0,
+        prefill_tokens_per_second=0.0,
+    ):
+        self.config = {
+            "model_id": model_id,
+            "first_token_latency": first_token_latency,
+            "tokens_per_second": tokens_per_second,
+            "response_tokens": response_tokens,
+            "seed": seed,
+            "cache_tools": cache_tools,
+            "cache_prompt": cache_prompt,
+            "min_cache_tokens": min_cache_tokens,
+            "cache_ttl": cache_ttl,
+            "prefill_tokens_per_second": prefill_tokens_per_second,
+        }
+        self.tool_call = tool_call
+        self.calls = 0
+        self.usage = {"inputTokens": 0, "outputTokens": 0, "cacheReadInputTokens": 0, "cacheWriteInputTokens": 0}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Yield `{"output": instance}` of the pydantic `output_model`, with field values derived from the prompt"""
+        await asyncio.sleep(self.config["first_token_latency"])
+        rng = random.Random(_seed(self.config["seed"], json.dumps(prompt, default=str)))
+        schema = output_model.model_json_schema()
+        output = output_model.model_validate(_fake_value(schema, schema.get("$defs", {}), rng))
+        with self._lock:
+            self.calls += 1
+            self.usage["inputTokens"] += count_tokens(system_prompt or "") + count_tokens(prompt)
+            self.usage["outputTokens"] += count_tokens(output.model_dump(mode="json"))
+        yield {"output": output}
+
+    def _pick_tool(self, messages, tool_specs):
+        if self.tool_call is None or not tool_specs:
+            return None
+        if any("toolResult" in block for block in messages[-1]["content"]):
+            return None
+        call = self.tool_call(messages) if callable(self.tool_call) else self.tool_call
+        if call is None or call[0] not in {spec["name"] for spec in tool_specs}:
+            return None
+        return call
+
+    def _answer(self, messages):
+        prompt = json.dumps(messages[-1]["content"], default=str)
+        rng = random.Random(_seed(self.config["seed"], prompt))
+        return [rng.choice(WORDS) for _ in range(self.config["response_tokens"])]
+
+    def _cache_points(self, tool_specs, system_prompt):
+        """(key, tokens) of the prefix ending at each cache point, shortest first"""
+        points = []
+        prefix = json.dumps(tool_specs or [], sort_keys=True, default=str)
+        tokens = count_tokens(tool_specs) if tool_specs else 0
+        if self.config["cache_tools"] and tool_specs:
+            points.append((_seed(prefix), tokens))
+        if self.config["cache_prompt"] and system_prompt:
+            points.append((_seed(prefix, system_prompt), tokens + count_tokens(system_prompt)))
+        return [point for point in points if point[1] >= self.config["min_cache_tokens"]]
+
+    def _use_cache(self, tool_specs, system_prompt):
+        """Prompt tokens (read, written) by the cache: the longest cached prefix is read, the rest up to the last point written"""
+        points = self._cache_points(tool_specs, system_prompt)
+        if not points:
+            return 0, 0
+        now = time.monotonic()
+        with self._lock:
+            read = 0
+            for key, tokens in points:
+                if self._cache.get(key, 0) > now:
+                    read = tokens
+            # Every point's entry lives another cache_ttl seconds from this use
+            for key, _ in points:
+                self._cache[key] = now + self.config["cache_ttl"]
+        return read, points[-1][1] - read
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        start = time.perf_counter()
+        prompt_tokens = count_tokens(system_prompt or "") + count_tokens(tool_specs or []) + count_tokens(messages)
+        cache_read, cache_write = self._use_cache(tool_specs, system_prompt)
+        input_tokens = prompt_tokens - cache_read - cache_write
+        prefill = self.config["prefill_tokens_per_second"]
+        await asyncio.sleep(self.config["first_token_latency"] + ((prompt_tokens - cache_read) / prefill if prefill else 0.0))
+        yield {"messageStart": {"role": "assistant"}}
+
+        tool = self._pick_tool(messages, tool_specs)
+        if tool is not None:
+            name, tool_input = tool
+            tool_use_id = f"tooluse_{_seed(name, json.dumps(messages, default=str)) % 10**12}"
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": name}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_input)}}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+            output_tokens = count_tokens(tool_input)
+        else:
+            delay = 1.0 / self.config["tokens_per_second"] if self.config["tokens_per_second"] else 0.0
+            words = self._answer(messages)
+            for i, word in enumerate(words):
+                if delay:
+                    await asyncio.sleep(delay)
+                yield {"contentBlockDelta": {"delta": {"text": word if i == 0 else f" {word}"}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+            output_tokens = len(words)
+
+        yield {"messageStop": {"stopReason": stop_reason}}
+        usage = {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": prompt_tokens + output_tokens}
+        if self.config["cache_tools"] or self.config["cache_prompt"]:
+            usage.update(cacheReadInputTokens=cache_read, cacheWriteInputTokens=cache_write)
+        with self._lock:
+            self.calls += 1
+            for key in self.usage:
+                self.usage[key] += usage.get(key, 0)
+        yield {
+            "metadata": {
+                "usage": usage,
+                "metrics": {"latencyMs": int((time.perf_counter() - start) * 1000)},
+            }
+        }
+
+
+class FakeSynthesizer:
+    """TTS callable like `speech.PollySynthesizer`: `latency + seconds_per_char * len(text)` per call."""
+
+    def __init__(self, latency=0.05, seconds_per_char=0.0005, bytes_per_char=100):
+        self.latency = latency
+        self.seconds_per_char = seconds_per_char
+        self.bytes_per_char = bytes_per_char
+        self.calls = 0
+
+    @property
+    def voice(self):
+        return "fake:standard"
+
+    @property
+    def suffix(self):
+        return ".mp3"
+
+    def __call__(self, text):
+        self.calls += 1
+        time.sleep(self.latency + self.seconds_per_char * len(text))
+        block = hashlib.sha256(text.encode("utf-8")).digest()
+        size = max(len(block), len(text) * self.bytes_per_char)
+        return (block * (size // len(block) + 1))[:size]
+
+
+def fake_manim_command(directory):
+    """Write an executable wrapper that runs fake_manim.py with this interpreter; returns its path."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_manim.py")
+    path = os.path.join(directory, "fake-manim")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
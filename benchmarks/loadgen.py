@@ -0,0 +1,63 @@
+"""
+Closed-loop load generator.
+
+`run_load(call, requests, concurrency)` keeps `concurrency` requests in
+flight until `requests` calls of `call(i)` have finished and reports
+throughput, latency percentiles, errors and the peak RSS of the process.
+"""
+import os
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared helpers of the demos (strands/instrumentation.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "strands"))
+from instrumentation import percentile
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_load(call, requests, concurrency, warmup=0):
+    """Run `call(i)` for i in range(requests) on `concurrency` threads after `warmup` unmeasured calls."""
+    for i in range(warmup):
+        call(-1 - i)
+
+    latencies = []
+    errors = []
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            if len(errors) == 1:
+                traceback.print_exc()
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(requests)))
+    seconds = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "seconds": round(seconds, 3),
+        "throughput": round(len(latencies) / seconds, 3) if seconds else 0.0,
+        "p50": round(percentile(latencies, 50), 4),
+        "p95": round(percentile(latencies, 95), 4),
+        "p99": round(percentile(latencies, 99), 4),
+        "max": round(max(latencies, default=0.0), 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "first_error": errors[0] if errors else None,
+    }
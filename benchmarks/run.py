@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Offline load test of the demos' entry points.
+
+Every scenario runs in its own process (so peak RSS and imported modules do
+not leak between scenarios) against the fake model, TTS and Manim from
+`fakes.py`, with `--concurrency` requests in flight, and reports throughput,
+p50/p95/p99 latency and peak RSS.
+
+    python benchmarks/run.py                                # all scenarios
+    python benchmarks/run.py rag_tool manim_chat -c 16 -n 200
+    python benchmarks/run.py --save-baseline                # record benchmarks/baseline.json
+    python benchmarks/run.py --check                        # exit 1 on a regression against it
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Options that change what is measured; a baseline only applies to runs with the same values
+SETTINGS = (
+    "requests", "concurrency", "warmup", "latency", "tokens_per_second", "response_tokens",
+    "prefill_tokens_per_second", "prompt_cache",
+    "sessions", "chunk_tokens", "render_seconds", "pages", "page_tokens", "encode_seconds", "unique_queries",
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test of the demo entry points")
+    parser.add_argument("scenarios", nargs="*", help="Scenarios to run (default: all)")
+    parser.add_argument("-n", "--requests", type=int, default=40, help="Measured requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before the run")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Fake model streaming speed")
+    parser.add_argument("--response-tokens", type=int, default=60, help="Fake model answer length")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0, help="Fake model prompt processing speed (0: instant)")
+    parser.add_argument("--prompt-cache", action="store_true", help="Put cache points after the tool specs and system prompt")
+    parser.add_argument("--sessions", type=int, default=4, help="agentcore_invoke: sessions the requests are spread over")
+    parser.add_argument("--chunk-tokens", type=int, default=2000, help="summary_speak: tokens per summarization chunk")
+    parser.add_argument("--render-seconds", type=float, default=0.5, help="manim_chat: duration of a fake render")
+    parser.add_argument("--pages", type=int, default=2000, help="rag_tool: pages in the index")
+    parser.add_argument("--page-tokens", type=int, default=128, help="rag_tool: vectors per page")
+    parser.add_argument("--encode-seconds", type=float, default=0.05, help="rag_tool: fake query encoding time")
+    parser.add_argument("--unique-queries", type=int, default=10, help="rag_tool: distinct questions among the requests")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Compare against the baseline and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before --check fails")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def settings(options):
+    return {name: getattr(options, name) for name in SETTINGS}
+
+
+def run_worker(options):
+    """Run one scenario in this process and write its result as JSON to `options.output`."""
+    sys.path.insert(0, BENCH_DIR)
+    from loadgen import run_load
+    from scenarios import SCENARIOS
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        # Scenario scratch files (and anything written to the working directory) stay in workdir
+        tempfile.tempdir = workdir
+        os.chdir(workdir)
+        with SCENARIOS[options.worker](options) as call:
+            result = run_load(call, options.requests, options.concurrency, warmup=options.warmup)
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_scenario(name, argv):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    try:
+        # Agents print their answers; only errors (stderr) are shown
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *argv, "--worker", name, "--output", output],
+            stdout=subprocess.DEVNULL,
+        )
+        if process.returncode != 0:
+            return {"failed": f"exit code {process.returncode}"}
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(output)
+
+
+def format_results(results):
+    lines = [f"{'scenario':<18}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'max s':>9}{'RSS MiB':>10}{'errors':>8}"]
+    for name, r in results.items():
+        if "failed" in r:
+            lines.append(f"{name:<18}  failed: {r['failed']}")
+            continue
+        lines.append(
+            f"{name:<18}{r['throughput']:>9.2f}{r['p50']:>9.3f}{r['p95']:>9.3f}{r['p99']:>9.3f}{r['max']:>9.3f}{r['peak_rss_mb']:>10.1f}{r['errors']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of the results against the baseline results, as messages."""
+    problems = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if "failed" in r:
+            problems.append(f"{name}: failed ({r['failed']})")
+            continue
+        if r["errors"] > base["errors"]:
+            problems.append(f"{name}: {r['errors']} errors (baseline {base['errors']})")
+        if r["throughput"] < base["throughput"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {r['throughput']:.2f} req/s < baseline {base['throughput']:.2f}")
+        for key in ("p95", "peak_rss_mb"):
+            if r[key] > base[key] * (1 + tolerance):
+                problems.append(f"{name}: {key} {r[key]} > baseline {base[key]}")
+    return problems
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = parse_args(argv)
+    if options.worker:
+        run_worker(options)
+        return 0
+
+    sys.path.insert(0, BENCH_DIR)
+    from scenarios import SCENARIOS
+
+    names = options.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+        return 2
+
+    worker_argv = [arg for arg in argv if arg not in names]
+    results = {}
+    for name in names:
+        print(f"Running {name} ...", flush=True)
+        results[name] = run_scenario(name, worker_argv)
+    print(format_results(results))
+
+    if options.save_baseline:
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings(options), "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {options.baseline}")
+
+    if options.check:
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["settings"] != settings(options):
+            print("The baseline was recorded with different settings; rerun with the same options or save a new baseline.")
+            return 2
+        problems = compare(results, baseline["results"], options.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print(f"No regressions against {options.baseline} (tolerance {options.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Benchmark scenarios: one per demo entry point, all offline.
+
+Each scenario is a context manager taking the parsed options and yielding
+`call(i)`, which performs request number `i` (negative numbers are warmup
+requests). Setup and teardown are not measured.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+
+from fakes import FakeModel, FakeSynthesizer, fake_manim_command
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STRANDS_DIR = os.path.join(ROOT, "strands")
+AGENTCORE_DIR = os.path.join(ROOT, "bedrock-agent-core", "demo-deploying-strands")
+SUMMARY_SPEAK_DIR = os.path.join(ROOT, "strands", "demo-summary-speak")
+MANIM_DIR = os.path.join(ROOT, "strands", "demo-manim-video-gen")
+RAG_DIR = os.path.join(ROOT, "strands", "demo-agentic-voice-based-rag-with-vision-based-retrieval")
+
+PROMPTS = [
+    "Summarize the file notes.txt in three bullet points.",
+    "What can you help me with?",
+    "Write a short haiku about autumn to haiku.txt.",
+    "List the main ideas of the last file you read.",
+    "Explain what a token bucket rate limiter does.",
+]
+
+MANIM_SCRIPT = """from manim import *
+
+class Bench{index}(Scene):
+    def construct(self):
+        circle = Circle(radius={radius})
+        self.play(Create(circle))
+        self.wait({wait})
+"""
+
+
+def fake_model(options, **kwargs):
+    if options.prompt_cache:
+        kwargs.update(cache_tools="default", cache_prompt="default")
+    return FakeModel(
+        first_token_latency=options.latency,
+        tokens_per_second=options.tokens_per_second,
+        response_tokens=options.response_tokens,
+        prefill_tokens_per_second=options.prefill_tokens_per_second,
+        **kwargs,
+    )
+
+
+@contextmanager
+def agentcore_invoke(options):
+    """`invoke` of the AgentCore app (pooled per-session agents), spread over `--sessions` sessions."""
+    sys.path.insert(0, AGENTCORE_DIR)
+    import app as agentcore_app
+
+    # create_agent() reads the module's shared model when a session's agent is built
+    agentcore_app.model_id = fake_model(options)
+
+    def call(i):
+        context = SimpleNamespace(session_id=f"bench-{i % options.sessions}")
+        return agentcore_app.invoke({"prompt": PROMPTS[i % len(PROMPTS)]}, context)
+
+    yield call
+
+
+@contextmanager
+def summary_speak(options):
+    """Map-reduce summary of a document followed by pipelined speech of the summary."""
+    sys.path.insert(0, SUMMARY_SPEAK_DIR)
+    sys.path.insert(0, STRANDS_DIR)
+    from speech import AudioCache, SpeechPipeline
+    from summarize import BedrockBackend, MapReduceSummarizer
+
+    with open(os.path.join(SUMMARY_SPEAK_DIR, "docs", "chapter10.txt"), encoding="utf-8") as f:
+        paragraphs = f.read().split("\n\n")
+    backend = BedrockBackend(model=fake_model(options))
+    workdir = tempfile.mkdtemp(prefix="bench-speech-")
+    pipeline = SpeechPipeline(FakeSynthesizer(), AudioCache(os.path.join(workdir, "audio_cache")), player=None)
+
+    def call(i):
+        # Rotating the paragraphs gives every request different chunks (and so a different summary)
+        shift = i % len(paragraphs)
+        text = "\n\n".join(paragraphs[shift:] + paragraphs[:shift])
+        summarizer = MapReduceSummarizer(backend, chunk_tokens=options.chunk_tokens, max_workers=4)
+        summary = summarizer.summarize(text)
+        pipeline.speak(summary, play_audio=False, output_path=os.path.join(workdir, f"{i}.mp3"))
+
+    yield call
+
+
+@contextmanager
+def manim_chat(options):
+    """One chat turn against the Manim MCP server: the model calls execute_manim_code with a fake `manim`."""
+    sys.path.insert(0, STRANDS_DIR)
+    from conversation_memory import TokenBudgetConversationManager
+    from mcp import StdioServerParameters, stdio_client
+    from strands import Agent
+    from strands.tools.mcp import MCPClient
+
+    workdir = tempfile.mkdtemp(prefix="bench-manim-")
+    env = {
+        **os.environ,
+        "MANIM_EXECUTABLE": fake_manim_command(workdir),
+        "MANIM_OUTPUT_DIR": os.path.join(workdir, "output"),
+        "MANIM_MAX_CONCURRENT_RENDERS": str(options.concurrency),
+        "MANIM_RENDER_CACHE": "0",
+        "FAKE_MANIM_SECONDS": str(options.render_seconds),
+    }
+    server = StdioServerParameters(command=sys.executable, args=[os.path.join(MANIM_DIR, "src", "manim_server.py")], env=env)
+
+    with ExitStack() as stack:
+        # The server's request log goes to a file instead of the terminal
+        server_log = stack.enter_context(open(os.path.join(workdir, "server.log"), "w"))
+        client = MCPClient(lambda: stdio_client(server, errlog=server_log))
+        stack.enter_context(client)
+        tools = client.list_tools_sync()
+
+        def call(i):
+            script = MANIM_SCRIPT.format(index=abs(i), radius=1 + i % 3, wait=1 + i % 2)
+            model = fake_model(options, tool_call=("execute_manim_code", {"manim_code": script}))
+            agent = Agent(
+                model=model,
+                tools=tools,
+                callback_handler=None,
+                conversation_manager=TokenBudgetConversationManager(),
+            )
+            result = agent(f"Render scene number {i}")
+            tool_results = [b["toolResult"] for m in agent.messages for b in m["content"] if "toolResult" in b]
+            if not tool_results or "Execution successful" not in str(tool_results[-1]["content"]):
+                raise RuntimeError(f"render did not succeed: {tool_results[-1] if tool_results else result}")
+
+        yield call
+
+
+@contextmanager
+def rag_tool(options):
+    """The retrieve_from_qdrant tool path on the embedded MaxSim index: encode, search, export the pages."""
+    import numpy as np
+    from PIL import Image
+
+    sys.path.insert(0, RAG_DIR)
+    from ingest import PageStore
+    from maxsim import LocalMultiVectorIndex
+    from retrieval import QueryCache, export_matches
+
+    workdir = tempfile.mkdtemp(prefix="bench-rag-")
+    store = PageStore(os.path.join(workdir, "page_store"))
+    index = LocalMultiVectorIndex(os.path.join(workdir, "index"), dim=128)
+    rng = np.random.default_rng(0)
+    batch = []
+    for page in range(options.pages):
+        store.save("bench", page, Image.new("RGB", (170, 220), (page % 256, 80, 160)))
+        vectors = rng.standard_normal((options.page_tokens, 128)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        batch.append((f"00000000-0000-0000-0000-{page:012d}", vectors, {"doc_id": "bench", "page_num": page}))
+        if len(batch) == 256:
+            index.add_many(batch)
+            batch = []
+    if batch:
+        index.add_many(batch)
+
+    query_cache = QueryCache()
+
+    def encode(text):
+        # Stands in for the ColPali forward pass of a query
+        time.sleep(options.encode_seconds)
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "big")
+        vectors = np.random.default_rng(seed).standard_normal((20, 128)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def search(embedding, limit):
+        return index.query_points(query=embedding, limit=limit).points
+
+    def call(i):
+        query = f"question number {abs(i) % options.unique_queries}"
+        embedding = query_cache.embedding(query, encode)
+        points = query_cache.search(embedding, 5, search)
+        if not export_matches(points, store, root=os.path.join(workdir, "matched_images")):
+            raise RuntimeError("no matches")
+
+    yield call
+
+
+SCENARIOS = {
+    "agentcore_invoke": agentcore_invoke,
+    "summary_speak": summary_speak,
+    "manim_chat": manim_chat,
+    "rag_tool": rag_tool,
+}
@@ -0,0 +1,294 @@
+"""
+Bounded conversation history for long-lived agents.
+
+`TokenBudgetConversationManager` is a strands conversation manager that keeps
+an agent's message history under a token budget. After every turn, if the
+history is over budget:
+
+1. bulky tool payloads (tool results and large tool inputs such as generated
+   scripts or file contents) of earlier turns are cut down to a short excerpt;
+2. if that is not enough, the oldest whole turns are folded into a running
+   summary that is prepended to the first turn that is kept.
+
+Each turn then resends at most about `max_tokens` of history, so a long
+session costs about the same per turn as a short one. `stats()` reports the
+retained history size.
+"""
+import json
+import logging
+import threading
+import time
+
+from strands.agent.conversation_manager import ConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+from token_count import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Images and documents are counted as a fixed number of tokens
+ATTACHMENT_TOKENS = 1600
+
+SUMMARY_MARKER = "[Summary of the earlier conversation]"
+
+SUMMARY_PROMPT = """You maintain the running summary of a conversation between a user and an assistant that uses tools.
+You receive the previous summary (if any) followed by the transcript of the turns that are being dropped from the history.
+Write a new summary that replaces the previous one:
+- bullet points, third person, no conversational text
+- keep the user's goals, preferences and decisions, facts and results that may be referred to again,
+  file paths, video paths and other identifiers, and any open questions
+- mention tool calls only by what they did and produced, never repeat code or file contents
+- at most {words} words"""
+
+
+def content_tokens(block):
+    """Estimated tokens of one message content block."""
+    if "text" in block:
+        return estimate_tokens(block["text"])
+    if "image" in block or "document" in block or "video" in block:
+        return ATTACHMENT_TOKENS
+    if "toolResult" in block:
+        return 8 + sum(content_tokens(item) for item in block["toolResult"].get("content", []))
+    if "json" in block:
+        return estimate_tokens(json.dumps(block["json"], default=str))
+    return estimate_tokens(json.dumps(block, default=str))
+
+
+def message_tokens(message):
+    return 4 + sum(content_tokens(block) for block in message["content"])
+
+
+def _excerpt(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    head = text[: max_chars // 2]
+    tail = text[-max_chars // 4 :]
+    return f"{head}\n[... {len(text) - len(head) - len(tail)} characters omitted ...]\n{tail}"
+
+
+def _truncate_value(value, max_chars):
+    """Shorten long strings anywhere in a tool input; returns (value, changed)."""
+    if isinstance(value, str):
+        short = _excerpt(value, max_chars)
+        return short, short is not value
+    if isinstance(value, dict):
+        changed = False
+        for key, item in value.items():
+            value[key], item_changed = _truncate_value(item, max_chars)
+            changed |= item_changed
+        return value, changed
+    if isinstance(value, list):
+        changed = False
+        for i, item in enumerate(value):
+            value[i], item_changed = _truncate_value(item, max_chars)
+            changed |= item_changed
+        return value, changed
+    return value, False
+
+
+def _truncate_block(block, max_chars):
+    """Cut a tool payload down to an excerpt in place; returns True if it changed."""
+    if "toolUse" in block:
+        _, changed = _truncate_value(block["toolUse"].get("input"), max_chars)
+        return changed
+    if "toolResult" in block:
+        changed = False
+        for item in block["toolResult"].get("content", []):
+            if "text" in item and len(item["text"]) > max_chars:
+                item["text"] = _excerpt(item["text"], max_chars)
+                changed = True
+            elif "json" in item:
+                text = json.dumps(item["json"], default=str)
+                if len(text) > max_chars:
+                    del item["json"]
+                    item["text"] = _excerpt(text, max_chars)
+                    changed = True
+        return changed
+    return False
+
+
+def turn_starts(messages):
+    """Indexes of the user prompts that start a turn (user messages that are not tool results)."""
+    return [
+        i
+        for i, message in enumerate(messages)
+        if message["role"] == "user" and not any("toolResult" in block for block in message["content"])
+    ]
+
+
+def render_transcript(messages, max_chars):
+    """Plain-text transcript of `messages` with tool payloads shortened to `max_chars`."""
+    lines = []
+    for message in messages:
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        for block in message["content"]:
+            if "text" in block:
+                lines.append(f"{speaker}: {_excerpt(block['text'], max_chars * 4)}")
+            elif "toolUse" in block:
+                tool_input = json.dumps(block["toolUse"].get("input"), default=str)
+                lines.append(f"{speaker} called {block['toolUse'].get('name')}: {_excerpt(tool_input, max_chars)}")
+            elif "toolResult" in block:
+                result = block["toolResult"]
+                parts = [item.get("text") or json.dumps(item.get("json"), default=str) for item in result.get("content", []) if "text" in item or "json" in item]
+                lines.append(f"Tool result ({result.get('status', 'success')}): {_excerpt(' '.join(parts), max_chars)}")
+            elif "image" in block or "document" in block:
+                lines.append(f"{speaker}: [attachment]")
+    return "\n".join(lines)
+
+
+def bedrock_summarizer(model, words=250):
+    """Summarizer that asks `model` (e.g. the agent's shared BedrockModel) for the running summary."""
+
+    def summarize(previous_summary, transcript):
+        from strands import Agent
+
+        prompt = (
+            f"Previous summary:\n{previous_summary or '(none)'}\n\n"
+            f"Transcript of the turns to fold in:\n{transcript}"
+        )
+        # A fresh, tool-less agent per call: the summary request never sees or changes the session's history
+        agent = Agent(model=model, system_prompt=SUMMARY_PROMPT.format(words=words), callback_handler=None)
+        return str(agent(prompt)).strip()
+
+    return summarize
+
+
+class TokenBudgetConversationManager(ConversationManager):
+    """
+    Keep an agent's history within `max_tokens` by shortening old tool payloads
+    and folding old turns into a running summary.
+
+    Compaction runs after a turn once the history is over `max_tokens` and
+    brings it down to about `target_ratio * max_tokens`, so it happens once
+    every few turns rather than on every turn. The latest turn is never
+    summarized. `summarizer(previous_summary, transcript)` returns the new
+    summary text; by default the agent's own model writes it.
+
+    strands calls `apply_management()` at the end of a turn, inside the
+    agent's event loop, so a summary request made there blocks that loop for a
+    whole model call. With `defer_compaction`, `apply_management()` only
+    notes that compaction is due, and the owner of the agent runs it with
+    `compact_pending()` after the turn, off the event loop (as `AgentPool`
+    does).
+    """
+
+    def __init__(
+        self,
+        max_tokens=16000,
+        target_ratio=0.6,
+        max_tool_chars=2000,
+        summary_words=250,
+        summarizer=None,
+        defer_compaction=False,
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.target_ratio = target_ratio
+        self.max_tool_chars = max_tool_chars
+        self.summary_words = summary_words
+        self.summarizer = summarizer
+        self.defer_compaction = defer_compaction
+        self.summary = None
+        self.compactions = 0
+        self.truncated_payloads = 0
+        self.summary_seconds = 0.0
+        self._retained = {"messages": 0, "tokens": 0}
+        self._pending = False
+        self._lock = threading.Lock()
+
+    def get_state(self):
+        return {"summary": self.summary, **super().get_state()}
+
+    def restore_from_session(self, state):
+        super().restore_from_session(state)
+        self.summary = state.get("summary")
+        return None
+
+    def apply_management(self, agent, **kwargs):
+        """Compact the history after a turn if it is over budget."""
+        if self.defer_compaction:
+            self._pending = True
+            return
+        self._compact(agent, self.max_tokens, int(self.max_tokens * self.target_ratio))
+
+    def compact_pending(self, agent):
+        """Run the compaction deferred by `apply_management()`; returns True if the history changed."""
+        if not self._pending:
+            return False
+        self._pending = False
+        return self._compact(agent, self.max_tokens, int(self.max_tokens * self.target_ratio))
+
+    def reduce_context(self, agent, e=None, **kwargs):
+        """Called when the model reports a context overflow: compact to half the current size."""
+        tokens = sum(message_tokens(m) for m in agent.messages)
+        if not self._compact(agent, 0, tokens // 2):
+            raise ContextWindowOverflowException("Unable to compact the conversation history any further") from e
+
+    def _compact(self, agent, limit, target):
+        """Bring the history down towards `target` tokens if it is over `limit`; returns True if it changed."""
+        messages = agent.messages
+        sizes = [message_tokens(m) for m in messages]
+        changed = False
+        if sum(sizes) > limit:
+            starts = turn_starts(messages)
+            latest_turn = starts[-1] if starts else len(messages)
+
+            # 1. Shorten bulky tool payloads of earlier turns
+            for i in range(latest_turn):
+                truncated = sum(_truncate_block(block, self.max_tool_chars) for block in messages[i]["content"])
+                if truncated:
+                    self.truncated_payloads += truncated
+                    sizes[i] = message_tokens(messages[i])
+                    changed = True
+
+            # 2. Fold the oldest turns into the summary until the rest fits the target
+            if sum(sizes) > target:
+                keep_from = next((s for s in starts[1:] if sum(sizes[s:]) <= target), latest_turn)
+                if 0 < keep_from < len(messages):
+                    self._fold(agent, keep_from)
+                    changed = True
+                    sizes = [message_tokens(m) for m in messages]
+            if changed:
+                self.compactions += 1
+
+        with self._lock:
+            self._retained = {"messages": len(messages), "tokens": sum(sizes)}
+        return changed
+
+    def _fold(self, agent, keep_from):
+        messages = agent.messages
+        folded = messages[:keep_from]
+        # The previous summary is the first block of the first folded turn; it is passed separately
+        folded_transcript = render_transcript(
+            [{**m, "content": [b for b in m["content"] if not b.get("text", "").startswith(SUMMARY_MARKER)]} for m in folded],
+            self.max_tool_chars,
+        )
+        summarizer = self.summarizer or bedrock_summarizer(agent.model, self.summary_words)
+
+        start = time.perf_counter()
+        summary = summarizer(self.summary, folded_transcript)
+        self.summary_seconds += time.perf_counter() - start
+        logger.debug("folded %d messages into the conversation summary", len(folded))
+
+        self.summary = summary
+        self.removed_message_count += len(folded)
+        first = messages[keep_from]
+        first["content"] = [{"text": f"{SUMMARY_MARKER}\n{summary}"}] + [
+            b for b in first["content"] if not b.get("text", "").startswith(SUMMARY_MARKER)
+        ]
+        messages[:] = messages[keep_from:]
+
+    def stats(self):
+        """Retained history size after the last turn, plus compaction counters."""
+        with self._lock:
+            retained = dict(self._retained)
+        return {
+            "retained_messages": retained["messages"],
+            "retained_tokens": retained["tokens"],
+            "max_tokens": self.max_tokens,
+            "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+            "summarized_messages": self.removed_message_count,
+            "compactions": self.compactions,
+            "truncated_payloads": self.truncated_payloads,
+            "summary_seconds": round(self.summary_seconds, 2),
+        }
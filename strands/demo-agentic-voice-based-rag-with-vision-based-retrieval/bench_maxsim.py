@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of the local MaxSim engine on synthetic ColPali-like data.
+
+Builds indexes of random multi-vector "pages" (tokens drawn around a few
+topics per page, like real page embeddings), issues queries made of noisy
+copies of a target page's tokens, and compares every first-stage setting
+against exact full-precision MaxSim over the unpooled vectors. Besides
+recall and latency it reports how many bytes of vectors a query reads: on an
+index larger than RAM that, not the arithmetic, is what the quantized first
+stage saves.
+
+    python bench_maxsim.py --pages 2000 --tokens 1030 --queries 50
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from maxsim import LocalMultiVectorIndex
+
+
+def normalize(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def noisy(rng, vectors, noise):
+    """Add noise of norm about `noise` to unit vectors and renormalize."""
+    dim = vectors.shape[-1]
+    return normalize(vectors + noise / np.sqrt(dim) * rng.standard_normal(vectors.shape).astype(np.float32))
+
+
+def make_pages(rng, pages, tokens, dim, topics=512, topics_per_page=32, noise=0.6):
+    centers = normalize(rng.standard_normal((topics, dim)).astype(np.float32))
+    for _ in range(pages):
+        page_topics = rng.choice(topics, size=topics_per_page, replace=False)
+        yield noisy(rng, centers[rng.choice(page_topics, size=tokens)], noise)
+
+
+def make_query(rng, page, query_tokens=20, noise=0.8):
+    return noisy(rng, page[rng.choice(len(page), size=query_tokens, replace=False)], noise)
+
+
+def percentile(values, pct):
+    return float(np.percentile(values, pct)) * 1000
+
+
+def scanned_mib(index, quantization, oversampling, limit):
+    """Vector bytes read by one query: the first-stage codes plus the rescored float vectors."""
+    stats = index.stats()
+    float_bytes = 4 * index.dim
+    if quantization is None:
+        return stats["live_tokens"] * float_bytes / 1024 / 1024
+    code_bytes = index.dim // 8 if quantization == "binary" else index.dim + 4
+    tokens_per_page = stats["live_tokens"] / max(1, stats["points"])
+    rescored = min(stats["points"], limit * oversampling) * tokens_per_page * float_bytes
+    return (stats["live_tokens"] * code_bytes + rescored) / 1024 / 1024
+
+
+def run(index, queries, truth, limit, **search):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = index.search(query, limit=limit, **search)
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected & {r.id for r in result})
+    return hits / (len(queries) * limit), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--tokens", type=int, default=1030, help="Token vectors per page")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--pool-factors", default="1,2,4", help="Comma-separated token pooling factors to compare")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    root = tempfile.mkdtemp(prefix="maxsim-bench-")
+    try:
+        pool_factors = [int(f) for f in args.pool_factors.split(",")]
+        indexes = {f: LocalMultiVectorIndex(f"{root}/pool{f}", dim=args.dim, pool_factor=f) for f in pool_factors}
+        targets = set(rng.choice(args.pages, size=args.queries, replace=False).tolist())
+        queries = []
+        batch = []
+        for i, page in enumerate(make_pages(rng, args.pages, args.tokens, args.dim)):
+            if i in targets:
+                queries.append(make_query(rng, page))
+            batch.append((i, page, {"doc_id": "synthetic", "page_num": i}))
+            if len(batch) == 64:
+                for index in indexes.values():
+                    index.add_many(batch)
+                batch = []
+        for index in indexes.values():
+            index.add_many(batch)
+
+        # Ground truth: exact MaxSim over the full, unpooled vectors
+        exact = indexes.get(1) or LocalMultiVectorIndex(f"{root}/exact", dim=args.dim)
+        truth = [{r.id for r in exact.search(q, limit=args.limit, quantization=None)} for q in queries]
+
+        print(f"{args.pages} pages x {args.tokens} tokens, {args.queries} queries, recall@{args.limit} vs exact MaxSim\n")
+        print(f"{'pool':>4} {'first stage':>11} {'oversample':>10} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'MiB read':>9} {'MiB on disk':>12}")
+        for factor, index in indexes.items():
+            size = index.stats()["bytes_on_disk"] / 1024 / 1024
+            settings = [(None, 1)] + [(q, o) for q in ("binary", "int8") for o in (1, 2, 4, 8)]
+            for quantization, oversampling in settings:
+                recall, latencies = run(index, queries, truth, args.limit, quantization=quantization, oversampling=oversampling)
+                print(
+                    f"{factor:>4} {quantization or 'exact':>11} {oversampling if quantization else '-':>10} {recall:>7.3f} "
+                    f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+                    f"{scanned_mib(index, quantization, oversampling, args.limit):>9.1f} {size:>12.1f}"
+                )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Pipelined, incremental ColPali indexing into Qdrant.
+
+Three stages run at the same time, joined by bounded queues:
+
+1. load:   hash each stored page, skip pages already in the collection and
+           load the rest from the `PageStore` (in a background thread)
+2. embed:  run ColPali on batches whose size adapts to available memory
+           (in the calling thread, which owns the model)
+3. upsert: write the points to Qdrant (in a background thread)
+
+Point IDs are UUIDs derived from the document, page number and a hash of the
+page image, so re-indexing after adding a PDF keeps every existing ID and
+only embeds pages that are new or changed. The `PageStore` remembers the
+point ID last written for each page, so the point of a changed page is
+deleted by ID instead of by a payload filter over the whole collection.
+
+Collections built by earlier versions of the notebook use integer point IDs
+(0..N in indexing order) and integer `doc_id` payloads. Re-indexing never
+replaces or deletes those points, so `is_legacy_collection()` detects them
+and `IndexingPipeline.run()` refuses to add to such a collection; delete and
+recreate it instead.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+
+import torch
+from qdrant_client.http import models
+
+# Pages checked against the collection per request in the load stage
+EXISTS_CHECK_SIZE = 64
+
+_DONE = object()
+
+
+def page_point_id(doc_id, page_num, path):
+    """Deterministic point ID for a stored page: changes only when the page does."""
+    digest = hashlib.sha256(f"{doc_id}\x00{page_num}\x00".encode("utf-8"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return str(uuid.UUID(bytes=digest.digest()[:16]))
+
+
+def is_legacy_collection(client, collection_name):
+    """Whether the collection holds points with the integer IDs and `doc_id` payloads of the original notebook."""
+    if not hasattr(client, "scroll"):
+        # The in-process index (maxsim.py) was never written by the original notebook
+        return False
+    # The original notebook numbered its points from 0
+    if client.retrieve(collection_name=collection_name, ids=[0], with_payload=False, with_vectors=False):
+        return True
+    points, _ = client.scroll(collection_name=collection_name, limit=1, with_payload=["doc_id"], with_vectors=False)
+    return any(isinstance(point.id, int) or not isinstance((point.payload or {}).get("doc_id"), str) for point in points)
+
+
+def available_memory_fraction(device):
+    """Fraction of memory still free on `device`, or None when it cannot be measured."""
+    try:
+        if str(device).startswith("cuda"):
+            free, total = torch.cuda.mem_get_info(device)
+            return free / total
+        import psutil
+
+        memory = psutil.virtual_memory()
+        return memory.available / memory.total
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") / os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def is_out_of_memory(error):
+    return isinstance(error, torch.cuda.OutOfMemoryError) or "out of memory" in str(error).lower()
+
+
+class AdaptiveBatchSize:
+    """
+    Embedding batch size that halves on out-of-memory errors and doubles after
+    `grow_after` successful batches while more than `min_free` of the memory
+    is still available.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, grow_after=8, min_free=0.3):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.grow_after = grow_after
+        self.min_free = min_free
+        self._successes = 0
+
+    def succeeded(self, device):
+        self._successes += 1
+        if self._successes < self.grow_after or self.size >= self.maximum:
+            return
+        self._successes = 0
+        free = available_memory_fraction(device)
+        if free is not None and free > self.min_free:
+            self.size = min(self.maximum, self.size * 2)
+
+    def shrink(self):
+        if self.size <= self.minimum:
+            return False
+        self.size = max(self.minimum, self.size // 2)
+        self._successes = 0
+        return True
+
+
+class IndexingPipeline:
+    """Embed pages from a `PageStore` with ColPali and upsert them into a Qdrant collection."""
+
+    def __init__(
+        self,
+        client,
+        collection_name,
+        model,
+        processor,
+        store,
+        batch_size=None,
+        queue_size=64,
+        source="pdf archive",
+        on_upsert=None,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.model = model
+        self.processor = processor
+        self.store = store
+        self.batch_size = batch_size or AdaptiveBatchSize()
+        self.queue_size = queue_size
+        self.source = source
+        # Called with the points after every successful upsert, e.g. QueryCache.invalidate
+        self.on_upsert = on_upsert
+        self.stats = {}
+
+    def run(self, pages, progress=None):
+        """
+        Index `pages` (records from `ingest.iter_pages`) and return the run stats.
+
+        `progress(count)` is called as pages are upserted or skipped, e.g. with
+        a tqdm bar's `update`. Raises RuntimeError for a collection built by
+        the original notebook (see `is_legacy_collection`).
+        """
+        if is_legacy_collection(self.client, self.collection_name):
+            raise RuntimeError(
+                f"Collection '{self.collection_name}' was built with integer point IDs by an earlier version "
+                "of the notebook; re-indexing would leave its points as stale duplicates. Delete and recreate it."
+            )
+        self.stats = {"pages": 0, "skipped": 0, "embedded": 0, "upserted": 0, "failed": 0, "batch_sizes": []}
+        self._progress = progress or (lambda count: None)
+        self._stop = threading.Event()
+        self._errors = []
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        upsert_queue = queue.Queue(maxsize=4)
+
+        loader = threading.Thread(target=self._guard, args=(self._load, pages, embed_queue), daemon=True)
+        uploader = threading.Thread(target=self._guard, args=(self._upsert, upsert_queue), daemon=True)
+        start = time.perf_counter()
+        loader.start()
+        uploader.start()
+        try:
+            self._embed(embed_queue, upsert_queue)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            self._put(upsert_queue, _DONE, force=True)
+            uploader.join()
+            self._stop.set()
+            loader.join()
+
+        if self._errors:
+            raise self._errors[0]
+        seconds = time.perf_counter() - start
+        self.stats["seconds"] = round(seconds, 2)
+        self.stats["pages_per_second"] = round(self.stats["embedded"] / seconds, 2) if seconds else 0.0
+        return self.stats
+
+    def _guard(self, stage, *args):
+        try:
+            stage(*args)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, q, item, force=False):
+        """Put into a bounded queue; gives up once the pipeline is stopping (`force` still tries while there is room)."""
+        while force or not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+        return False
+
+    def _get(self, q):
+        """Get from a queue, returning _DONE once the pipeline is stopping and the queue is drained."""
+        while True:
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _load(self, pages, embed_queue):
+        try:
+            group = []
+            for page in pages:
+                if self._stop.is_set():
+                    return
+                self.stats["pages"] += 1
+                group.append((page, page_point_id(page["doc_id"], page["page_num"], page["path"])))
+                if len(group) >= EXISTS_CHECK_SIZE:
+                    self._load_group(group, embed_queue)
+                    group = []
+            if group:
+                self._load_group(group, embed_queue)
+        finally:
+            # Stops the rasterization workers of an iter_pages generator we did not exhaust
+            if hasattr(pages, "close"):
+                pages.close()
+            self._put(embed_queue, _DONE, force=True)
+
+    def _load_group(self, group, embed_queue):
+        existing = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[point_id for _, point_id in group],
+            with_payload=False,
+            with_vectors=False,
+        )
+        existing = {str(point.id) for point in existing}
+        skipped = 0
+        for page, point_id in group:
+            if point_id in existing:
+                # Pages indexed before their point IDs were recorded get their record here
+                if self.store.point_id(page["doc_id"], page["page_num"]) != point_id:
+                    self.store.set_point_id(page["doc_id"], page["page_num"], point_id)
+                skipped += 1
+                continue
+            image = self.store.load(page["doc_id"], page["page_num"])
+            if not self._put(embed_queue, (page, point_id, image)):
+                return
+        if skipped:
+            self.stats["skipped"] += skipped
+            self._progress(skipped)
+
+    def _embed(self, embed_queue, upsert_queue):
+        pending = []
+        done = False
+        while not done or pending:
+            while not done and len(pending) < self.batch_size.size:
+                item = self._get(embed_queue)
+                if item is _DONE:
+                    done = True
+                else:
+                    pending.append(item)
+            if not pending:
+                continue
+
+            batch = pending[: self.batch_size.size]
+            try:
+                with torch.no_grad():
+                    inputs = self.processor.process_images([image for _, _, image in batch]).to(self.model.device)
+                    embeddings = self.model(**inputs)
+            except RuntimeError as e:
+                if is_out_of_memory(e) and self.batch_size.shrink():
+                    if torch.cuda.is_available():
+                        torch.cuda.empty_cache()
+                    continue
+                raise
+            del pending[: len(batch)]
+            self.batch_size.succeeded(self.model.device)
+            self.stats["embedded"] += len(batch)
+            self.stats["batch_sizes"].append(len(batch))
+
+            # One bulk conversion per batch instead of a tensor .tolist() per page
+            vectors = embeddings.float().cpu().numpy()
+            points = [
+                models.PointStruct(
+                    id=point_id,
+                    vector=vector.tolist(),
+                    payload={"doc_id": page["doc_id"], "page_num": page["page_num"], "source": self.source},
+                )
+                for (page, point_id, _), vector in zip(batch, vectors)
+            ]
+            if not self._put(upsert_queue, points):
+                return
+
+    def _upsert(self, upsert_queue):
+        while True:
+            points = self._get(upsert_queue)
+            if points is _DONE:
+                return
+            try:
+                self.client.upsert(collection_name=self.collection_name, points=points)
+                self._delete_replaced(points)
+                self.stats["upserted"] += len(points)
+                if self.on_upsert is not None:
+                    self.on_upsert(points)
+            except Exception as e:
+                print(f"Error during upsert: {e}")
+                self.stats["failed"] += len(points)
+            self._progress(len(points))
+
+    def _delete_replaced(self, points):
+        """Remove the older points of pages that changed since they were last indexed, then record the new IDs."""
+        replaced = []
+        for point in points:
+            previous = self.store.point_id(point.payload["doc_id"], point.payload["page_num"])
+            if previous is not None and previous != str(point.id):
+                replaced.append(previous)
+        if replaced:
+            self.client.delete(collection_name=self.collection_name, points_selector=models.PointIdsList(points=replaced))
+        # Recorded only after the delete, so an interrupted run deletes the old points next time
+        for point in points:
+            self.store.set_point_id(point.payload["doc_id"], point.payload["page_num"], point.id)
@@ -0,0 +1,190 @@
+"""
+Streaming PDF ingestion for the vision RAG pipeline.
+
+PDF pages are rasterized in a process pool and written once to a `PageStore`
+on disk, addressed by `(doc_id, page_num)`. `iter_pages` yields lightweight
+page records (ids and file path, no pixels) as pages become available, so
+memory stays flat however many pages the corpus has: images are only loaded
+from the store when a batch actually needs them.
+
+Documents that are already fully in the store (same file size and
+modification time) are not rasterized again.
+"""
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# Pages rasterized per task; bounds the memory of each worker process
+PAGES_PER_TASK = 8
+
+DEFAULT_DPI = 200
+
+
+def list_pdfs(pdf_dir):
+    """PDF files in `pdf_dir`, sorted so doc ids and ordering are stable."""
+    return sorted(os.path.join(pdf_dir, name) for name in os.listdir(pdf_dir) if name.lower().endswith(".pdf"))
+
+
+def document_id(pdf_path):
+    """Stable id of a document: its file name without extension, made path-safe."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return re.sub(r"[^\w.-]+", "_", stem)
+
+
+class PageStore:
+    """
+    Rasterized pages on disk as `<root>/<doc_id>/page_<page_num>.png`.
+
+    Each document directory also holds `document.json` with the source file
+    and page count, written once all of its pages are stored, and a
+    `page_<page_num>.point` file per indexed page with the ID of the index
+    point last written for it.
+    """
+
+    def __init__(self, root="page_store"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, doc_id, page_num):
+        return os.path.join(self.root, str(doc_id), f"page_{page_num:05d}.png")
+
+    def exists(self, doc_id, page_num):
+        return os.path.exists(self.path(doc_id, page_num))
+
+    def save(self, doc_id, page_num, image):
+        path = self.path(doc_id, page_num)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        image.convert("RGB").save(tmp_path, "PNG")
+        os.replace(tmp_path, path)
+        return path
+
+    def point_id(self, doc_id, page_num):
+        """ID of the index point last written for this page, or None."""
+        try:
+            with open(self._point_path(doc_id, page_num), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_point_id(self, doc_id, page_num, point_id):
+        path = self._point_path(doc_id, page_num)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(point_id))
+        os.replace(tmp_path, path)
+
+    def _point_path(self, doc_id, page_num):
+        return os.path.join(self.root, str(doc_id), f"page_{page_num:05d}.point")
+
+    def load(self, doc_id, page_num):
+        """Load a page as an RGB PIL image."""
+        with Image.open(self.path(doc_id, page_num)) as image:
+            return image.convert("RGB")
+
+    def document_info(self, doc_id):
+        try:
+            with open(os.path.join(self.root, str(doc_id), "document.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def mark_complete(self, doc_id, pdf_path, pages):
+        stat = os.stat(pdf_path)
+        info = {"source": os.path.abspath(pdf_path), "size": stat.st_size, "mtime": stat.st_mtime, "pages": pages}
+        path = os.path.join(self.root, str(doc_id), "document.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+    def is_complete(self, doc_id, pdf_path):
+        """True when every page of this exact file is already in the store."""
+        info = self.document_info(doc_id)
+        if info is None:
+            return False
+        stat = os.stat(pdf_path)
+        return (
+            info["size"] == stat.st_size
+            and info["mtime"] == stat.st_mtime
+            and all(self.exists(doc_id, page_num) for page_num in range(info["pages"]))
+        )
+
+
+def page_count(pdf_path, poppler_path=None):
+    from pdf2image import pdfinfo_from_path
+
+    return pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+
+
+def _rasterize(pdf_path, doc_id, first, last, store_root, dpi, poppler_path):
+    """Worker: rasterize pages `first..last` (0-based, inclusive) straight into the store."""
+    from pdf2image import convert_from_path
+
+    store = PageStore(store_root)
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=first + 1, last_page=last + 1, poppler_path=poppler_path)
+    for offset, image in enumerate(images):
+        store.save(doc_id, first + offset, image)
+        image.close()
+    return first, first + len(images)
+
+
+def _page_record(store, doc_id, page_num):
+    return {"doc_id": doc_id, "page_num": page_num, "path": store.path(doc_id, page_num)}
+
+
+def _tasks(pdf_dir, store, poppler_path, pages_per_task):
+    """Page ranges to produce, in document order: `(pdf_path, doc_id, first, last, pages, stored)`."""
+    for pdf_path in list_pdfs(pdf_dir):
+        doc_id = document_id(pdf_path)
+        if store.is_complete(doc_id, pdf_path):
+            pages = store.document_info(doc_id)["pages"]
+            yield pdf_path, doc_id, 0, pages - 1, pages, True
+            continue
+        pages = page_count(pdf_path, poppler_path)
+        for first in range(0, pages, pages_per_task):
+            last = min(first + pages_per_task, pages) - 1
+            stored = all(store.exists(doc_id, n) for n in range(first, last + 1))
+            yield pdf_path, doc_id, first, last, pages, stored
+
+
+def iter_pages(pdf_dir, store, workers=None, dpi=DEFAULT_DPI, poppler_path=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Yield `{"doc_id", "page_num", "path"}` for every page of every PDF in `pdf_dir`.
+
+    Pages come out in document and page order. Pages missing from the store
+    are rasterized by `workers` processes (default: CPU count), with at most
+    two tasks per worker in flight so the generator never runs far ahead of
+    its consumer.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = _tasks(pdf_dir, store, poppler_path, pages_per_task)
+    in_flight = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def submit_more():
+            while len(in_flight) < workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    return
+                pdf_path, doc_id, first, last, _, stored = task
+                future = None
+                if not stored:
+                    future = executor.submit(_rasterize, pdf_path, doc_id, first, last, store.root, dpi, poppler_path)
+                in_flight.append((task, future))
+
+        submit_more()
+        while in_flight:
+            (pdf_path, doc_id, first, last, pages, stored), future = in_flight.popleft()
+            if future is not None:
+                future.result()
+            submit_more()
+            for page_num in range(first, last + 1):
+                yield _page_record(store, doc_id, page_num)
+            if last == pages - 1 and not store.is_complete(doc_id, pdf_path):
+                store.mark_complete(doc_id, pdf_path, pages)
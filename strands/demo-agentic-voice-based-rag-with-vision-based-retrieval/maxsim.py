@@ -0,0 +1,306 @@
+"""
+Embeddable late-interaction (MaxSim) search over ColPali multi-vectors.
+
+`LocalMultiVectorIndex` keeps every page's token vectors in memory-mapped
+files in a directory, so no database server is needed and the OS pages the
+vectors in and out instead of holding them all in RAM:
+
+    vectors.f32   full-precision token vectors, (tokens, dim) float32
+    binary.u8     1 bit per dimension (sign), (tokens, dim / 8) uint8
+    int8.i8       per-token scaled int8 codes, (tokens, dim) int8
+    scales.f32    int8 scale of every token, (tokens,) float32
+    points.jsonl  append-only log of points (id, payload, token range) and deletions
+
+A search scores every page with the binary or int8 codes first, then
+rescores the best `limit * oversampling` candidates with exact MaxSim over
+the float vectors. Optional token pooling (`pool_factor`) clusters each
+page's tokens and stores their means, shrinking the index by that factor.
+
+The index answers `query_points`, `upsert`, `retrieve` and `delete` like a
+`QdrantClient` for one collection, so it can be passed wherever the
+notebook uses `client`, including `retrieve_from_qdrant` and
+`indexing.IndexingPipeline`.
+"""
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+# Tokens scored per block in the first stage; bounds the temporary memory of a search
+BLOCK_TOKENS = 65536
+
+QUANTIZATIONS = ("binary", "int8", None)
+
+
+def maxsim(query, doc):
+    """Exact late-interaction score: sum over query tokens of the best matching doc token."""
+    return float((query @ doc.T).max(axis=1).sum())
+
+
+def pool_tokens(vectors, pool_factor, iterations=5):
+    """
+    Reduce a page's token vectors to about `len(vectors) / pool_factor` vectors.
+
+    Tokens are grouped with a few rounds of spherical k-means (initialized
+    with evenly spaced tokens, so results are deterministic) and each group
+    is replaced by its normalized mean.
+    """
+    count = max(1, int(np.ceil(len(vectors) / pool_factor)))
+    if pool_factor <= 1 or count >= len(vectors):
+        return vectors
+    centroids = vectors[np.linspace(0, len(vectors) - 1, count).astype(int)].copy()
+    for _ in range(iterations):
+        assignment = (vectors @ centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        used = np.bincount(assignment, minlength=count) > 0
+        norms = np.linalg.norm(sums[used], axis=1, keepdims=True)
+        centroids[used] = sums[used] / np.maximum(norms, 1e-12)
+    assignment = (vectors @ centroids.T).argmax(axis=1)
+    return centroids[np.unique(assignment)]
+
+
+def _match(condition, point_id, payload):
+    """Evaluate the subset of Qdrant filter conditions the notebook uses."""
+    if hasattr(condition, "has_id"):
+        return point_id in {str(i) for i in condition.has_id}
+    if hasattr(condition, "key"):
+        return payload.get(condition.key) == condition.match.value
+    return _matches_filter(condition, point_id, payload)
+
+
+def _matches_filter(filter, point_id, payload):
+    must = getattr(filter, "must", None) or []
+    should = getattr(filter, "should", None) or []
+    must_not = getattr(filter, "must_not", None) or []
+    return (
+        all(_match(c, point_id, payload) for c in must)
+        and (not should or any(_match(c, point_id, payload) for c in should))
+        and not any(_match(c, point_id, payload) for c in must_not)
+    )
+
+
+class LocalMultiVectorIndex:
+    """Memory-mapped multi-vector index with quantized first-stage search and exact rescoring."""
+
+    def __init__(self, path, dim=128, pool_factor=1, quantization="binary", oversampling=4.0):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of: {QUANTIZATIONS}")
+        self.path = path
+        self.dim = dim
+        self.pool_factor = pool_factor
+        self.quantization = quantization
+        self.oversampling = oversampling
+        self.version = 0
+        self._lock = threading.RLock()
+        self._points = {}
+        self._order = []
+        self._tokens = 0
+        self._arrays = None
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    # Storage
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        log = self._file("points.jsonl")
+        if not os.path.exists(log):
+            return
+        with open(log, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "delete" in entry:
+                    self._points.pop(entry["delete"], None)
+                else:
+                    self._points[entry["id"]] = entry
+                    self._tokens = max(self._tokens, entry["offset"] + entry["length"])
+        self._order = sorted(self._points.values(), key=lambda e: e["offset"])
+
+    def _log(self, entries):
+        with open(self._file("points.jsonl"), "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def _mapped(self):
+        """Memory maps of the token arrays, reopened when points were added."""
+        if self._arrays is None or self._arrays[0] != self._tokens:
+            if self._tokens == 0:
+                return None
+            shape = (self._tokens, self.dim)
+            self._arrays = (
+                self._tokens,
+                np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=shape),
+                np.memmap(self._file("binary.u8"), dtype=np.uint8, mode="r", shape=(self._tokens, self.dim // 8)),
+                np.memmap(self._file("int8.i8"), dtype=np.int8, mode="r", shape=shape),
+                np.memmap(self._file("scales.f32"), dtype=np.float32, mode="r", shape=(self._tokens,)),
+            )
+        return self._arrays
+
+    def __len__(self):
+        return len(self._points)
+
+    # Writes
+
+    def add(self, point_id, vectors, payload=None):
+        """Add or replace a page given its (tokens, dim) vectors."""
+        self.add_many([(point_id, vectors, payload)])
+
+    def add_many(self, items):
+        encoded, entries = [], []
+        with self._lock:
+            offset = self._tokens
+            for point_id, vectors, payload in items:
+                vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+                vectors = pool_tokens(vectors, self.pool_factor)
+                scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+                encoded.append((
+                    vectors,
+                    np.packbits(vectors > 0, axis=1),
+                    np.round(vectors / scales[:, None]).astype(np.int8),
+                    scales.astype(np.float32),
+                ))
+                entries.append({"id": str(point_id), "payload": payload or {}, "offset": offset, "length": len(vectors)})
+                offset += len(vectors)
+
+            for name, index in (("vectors.f32", 0), ("binary.u8", 1), ("int8.i8", 2), ("scales.f32", 3)):
+                with open(self._file(name), "ab") as f:
+                    for arrays in encoded:
+                        f.write(np.ascontiguousarray(arrays[index]).tobytes())
+            self._log(entries)
+            for entry in entries:
+                self._points[entry["id"]] = entry
+            self._order = sorted(self._points.values(), key=lambda e: e["offset"])
+            self._tokens = offset
+            self.version += 1
+
+    def remove(self, point_ids):
+        with self._lock:
+            removed = [str(i) for i in point_ids if str(i) in self._points]
+            if not removed:
+                return 0
+            self._log([{"delete": point_id} for point_id in removed])
+            for point_id in removed:
+                del self._points[point_id]
+            self._order = sorted(self._points.values(), key=lambda e: e["offset"])
+            self.version += 1
+            return len(removed)
+
+    def compact(self):
+        """Rewrite the files without the tokens of deleted or replaced points."""
+        with self._lock:
+            arrays = self._mapped()
+            items = [(e["id"], np.array(arrays[1][e["offset"] : e["offset"] + e["length"]]), e["payload"]) for e in self._order] if arrays else []
+            pool_factor, self.pool_factor = self.pool_factor, 1
+            self._arrays = None
+            for name in ("vectors.f32", "binary.u8", "int8.i8", "scales.f32", "points.jsonl"):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            self._points, self._order, self._tokens = {}, [], 0
+            try:
+                self.add_many(items)
+            finally:
+                self.pool_factor = pool_factor
+
+    # Search
+
+    def search(self, query, limit=5, quantization="default", oversampling=None):
+        """
+        Return the `limit` best pages for a (query_tokens, dim) query as
+        objects with `id`, `score` and `payload`, best first.
+        """
+        quantization = self.quantization if quantization == "default" else quantization
+        oversampling = oversampling or self.oversampling
+        query = np.asarray(query, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            arrays = self._mapped()
+            order = self._order
+        if arrays is None or not order:
+            return []
+        _, vectors, binary, int8, scales = arrays
+
+        if quantization is None:
+            candidates = order
+        else:
+            approx = self._first_stage(query, order, binary, int8, scales, quantization)
+            count = min(len(order), max(limit, int(np.ceil(limit * oversampling))))
+            top = np.argpartition(-approx, count - 1)[:count]
+            candidates = [order[i] for i in top]
+
+        scored = [
+            (maxsim(query, vectors[e["offset"] : e["offset"] + e["length"]]), e)
+            for e in candidates
+        ]
+        scored.sort(key=lambda item: -item[0])
+        return [SimpleNamespace(id=e["id"], score=score, payload=e["payload"]) for score, e in scored[:limit]]
+
+    def _first_stage(self, query, order, binary, int8, scales, quantization):
+        """Approximate MaxSim of every page from the quantized codes, block by block."""
+        starts = np.array([e["offset"] for e in order], dtype=np.int64)
+        lengths = np.array([e["length"] for e in order], dtype=np.int64)
+        scores = np.empty(len(order), dtype=np.float32)
+
+        first = 0
+        while first < len(order):
+            # Take whole pages until the block is full; replaced pages' tokens in between are skipped
+            last = first + 1
+            while last < len(order) and starts[last] + lengths[last] - starts[first] <= BLOCK_TOKENS:
+                last += 1
+            lo, hi = starts[first], starts[last - 1] + lengths[last - 1]
+            if quantization == "binary":
+                # q . (2 * bits - 1) == 2 * (q . bits) - sum(q), without materializing the +-1 vectors
+                bits = np.unpackbits(binary[lo:hi], axis=1, count=self.dim).astype(np.float32)
+                token_scores = 2 * (query @ bits.T) - query.sum(axis=1, keepdims=True)
+            else:
+                token_scores = (query @ int8[lo:hi].astype(np.float32).T) * scales[lo:hi]
+            best = np.maximum.reduceat(token_scores, starts[first:last] - lo, axis=1)
+            # reduceat runs to the next start, so clip pages followed by skipped tokens to their own length
+            for i in np.nonzero(starts[first + 1 : last] != starts[first : last - 1] + lengths[first : last - 1])[0]:
+                s = starts[first + i] - lo
+                best[:, i] = token_scores[:, s : s + lengths[first + i]].max(axis=1)
+            scores[first:last] = best.sum(axis=0)
+            first = last
+        return scores
+
+    # QdrantClient-compatible surface for a single collection
+
+    def query_points(self, collection_name=None, query=None, limit=10, search_params=None, **kwargs):
+        return SimpleNamespace(points=self.search(query, limit=limit))
+
+    def upsert(self, collection_name=None, points=(), **kwargs):
+        self.add_many([(p.id, p.vector, p.payload) for p in points])
+        return SimpleNamespace(status="completed")
+
+    def retrieve(self, collection_name=None, ids=(), with_payload=True, with_vectors=False, **kwargs):
+        return [
+            SimpleNamespace(id=self._points[str(i)]["id"], payload=self._points[str(i)]["payload"] if with_payload else None)
+            for i in ids
+            if str(i) in self._points
+        ]
+
+    def delete(self, collection_name=None, points_selector=None, **kwargs):
+        """Delete by a list of ids, a PointIdsList, or a FilterSelector over payload fields and ids."""
+        selector_filter = getattr(points_selector, "filter", None)
+        if selector_filter is not None:
+            ids = [e["id"] for e in self._order if _matches_filter(selector_filter, e["id"], e["payload"])]
+        else:
+            ids = getattr(points_selector, "points", points_selector) or []
+        return SimpleNamespace(status="completed", deleted=self.remove(ids))
+
+    def stats(self):
+        with self._lock:
+            stored = self._tokens
+            live = sum(e["length"] for e in self._order)
+        return {
+            "points": len(self._points),
+            "live_tokens": live,
+            "stored_tokens": stored,
+            "bytes_on_disk": sum(
+                os.path.getsize(self._file(n)) for n in ("vectors.f32", "binary.u8", "int8.i8", "scales.f32") if os.path.exists(self._file(n))
+            ),
+            "version": self.version,
+        }
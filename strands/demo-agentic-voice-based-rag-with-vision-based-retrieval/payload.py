@@ -0,0 +1,189 @@
+"""
+Smaller multimodal requests for the answering models.
+
+Stored pages are full-resolution PNGs, far larger than what the models use:
+Claude downsizes anything beyond about 1.15 megapixels anyway and bills
+roughly `width * height / 750` tokens per image. `ImageEncoder` resizes each
+page to fit a pixel and token budget and re-encodes it (JPEG by default),
+caching the encoded variant on disk by page content and settings, so a page
+is encoded once however many query folders it is exported to.
+`bedrock_runtime()` hands out one shared, thread-safe bedrock-runtime client
+per region instead of a new client per call.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from PIL import Image
+
+# Claude's guidance: images up to 1568 px on the long edge and ~1600 tokens are not downscaled
+DEFAULT_MAX_LONG_EDGE = 1568
+DEFAULT_MAX_TOKENS = 1600
+PIXELS_PER_TOKEN = 750
+
+DEFAULT_CACHE_DIR = "encoded_pages"
+DEFAULT_MAX_CACHE_FILES = 2000
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def bedrock_runtime(region_name="us-east-1", max_pool_connections=16):
+    """Shared bedrock-runtime client for a region, created on first use."""
+    with _clients_lock:
+        client = _clients.get(region_name)
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "bedrock-runtime",
+                region_name=region_name,
+                config=Config(max_pool_connections=max_pool_connections, retries={"mode": "adaptive"}),
+            )
+            _clients[region_name] = client
+        return client
+
+
+def fit_size(width, height, max_long_edge=DEFAULT_MAX_LONG_EDGE, max_tokens=DEFAULT_MAX_TOKENS):
+    """Largest size with the same aspect ratio within both the edge and the token budget."""
+    scale = min(1.0, max_long_edge / max(width, height))
+    max_pixels = max_tokens * PIXELS_PER_TOKEN
+    if width * height * scale * scale > max_pixels:
+        scale = (max_pixels / (width * height)) ** 0.5
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def estimate_tokens(width, height):
+    return max(1, round(width * height / PIXELS_PER_TOKEN))
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    format: str
+    width: int
+    height: int
+    original_bytes: int
+    seconds: float
+    cached: bool
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.width, self.height)
+
+
+class ImageEncoder:
+    """
+    Resize and re-encode page images to a budget, caching the result by page
+    content and settings. The cache keeps the `max_cache_files` most recently
+    used encodings.
+    """
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_long_edge=DEFAULT_MAX_LONG_EDGE,
+        max_tokens=DEFAULT_MAX_TOKENS,
+        format="jpeg",
+        quality=85,
+        max_cache_files=DEFAULT_MAX_CACHE_FILES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_cache_files = max_cache_files
+        self.max_long_edge = max_long_edge
+        self.max_tokens = max_tokens
+        self.format = format.lower()
+        self.quality = quality
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, path):
+        # Keyed by content: exported pages are new links or copies of the stored page in every query folder
+        digest = hashlib.sha1(f"{self.max_long_edge}:{self.max_tokens}:{self.quality}:".encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return os.path.join(self.cache_dir, f"{digest.hexdigest()}.{self.format}")
+
+    def _prune(self):
+        """Remove the least recently used encodings beyond max_cache_files."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(f".{self.format}"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        for _, path in sorted(entries)[: max(0, len(entries) - self.max_cache_files)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def encode(self, path):
+        """Encode the image file at `path`, returning an `EncodedImage`."""
+        start = time.perf_counter()
+        original_bytes = os.path.getsize(path)
+        cache_path = self._cache_path(path)
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                data = f.read()
+            # Marks the entry as recently used for _prune
+            os.utime(cache_path)
+            with Image.open(io.BytesIO(data)) as image:
+                width, height = image.size
+            return EncodedImage(data, self.format, width, height, original_bytes, time.perf_counter() - start, True)
+
+        with Image.open(path) as image:
+            image = image.convert("RGB")
+        width, height = fit_size(*image.size, self.max_long_edge, self.max_tokens)
+        if (width, height) != image.size:
+            image = image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if self.format == "jpeg":
+            image.save(buffer, "JPEG", quality=self.quality, optimize=True)
+        elif self.format == "webp":
+            image.save(buffer, "WEBP", quality=self.quality)
+        else:
+            image.save(buffer, self.format.upper(), optimize=True)
+        data = buffer.getvalue()
+
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+        if self.max_cache_files:
+            self._prune()
+        return EncodedImage(data, self.format, width, height, original_bytes, time.perf_counter() - start, False)
+
+    def encode_many(self, paths):
+        """Encode several images, returning them with a size and timing report."""
+        images = [self.encode(path) for path in paths]
+        report = {
+            "images": len(images),
+            "original_bytes": sum(i.original_bytes for i in images),
+            "request_bytes": sum(len(i.data) for i in images),
+            "image_tokens": sum(i.tokens for i in images),
+            "encode_ms": round(sum(i.seconds for i in images) * 1000, 1),
+            "cache_hits": sum(i.cached for i in images),
+        }
+        return images, report
+
+
+def format_report(report):
+    saved = 1 - report["request_bytes"] / report["original_bytes"] if report["original_bytes"] else 0.0
+    return (
+        f"📦 {report['images']} images: {report['original_bytes'] / 1024:.0f} KiB -> {report['request_bytes'] / 1024:.0f} KiB "
+        f"({saved:.0%} smaller), ~{report['image_tokens']} image tokens, encoded in {report['encode_ms']} ms "
+        f"({report['cache_hits']} from cache)"
+    )
+
+
+def converse_image_content(paths, encoder):
+    """Converse API content blocks for the images at `paths`, plus the payload report."""
+    images, report = encoder.encode_many(paths)
+    content = [{"image": {"format": image.format, "source": {"bytes": image.data}}} for image in images]
+    return content, report
@@ -0,0 +1,159 @@
+"""
+Query-time helpers for the vision RAG pipeline.
+
+Search hits are resolved to their page files through the `PageStore` path
+scheme in O(1), with no scan over the corpus and no re-encoding: the stored
+PNGs are hard-linked (or copied, across filesystems) into a fresh directory
+per query, so concurrent queries never delete each other's results.
+
+`QueryCache` skips repeated work for repeated questions: normalized query
+text maps to its embedding, and an embedding maps to its top-k hits for the
+current collection version.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+MATCHED_IMAGES_DIR = "matched_images"
+
+# Query directories to keep under MATCHED_IMAGES_DIR; older ones are removed
+KEEP_QUERY_DIRS = 50
+
+
+def query_output_dir(root=MATCHED_IMAGES_DIR, keep=KEEP_QUERY_DIRS):
+    """Create a new, uniquely named directory for one query's results and prune old ones."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(path)
+
+    entries = [os.path.join(root, name) for name in os.listdir(root)]
+    entries = sorted((e for e in entries if os.path.isdir(e) and e != path), key=os.path.getmtime)
+    for old in entries[: max(0, len(entries) - keep + 1)]:
+        shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def export_matches(points, store, root=MATCHED_IMAGES_DIR):
+    """
+    Place the page image of every hit in a new per-query directory.
+
+    `points` are Qdrant scored points (or anything with a `payload` holding
+    `doc_id` and `page_num`). Hits whose page is missing from the store are
+    skipped. Returns the image paths in ranking order.
+    """
+    output_dir = query_output_dir(root)
+    paths = []
+    for rank, point in enumerate(points):
+        doc_id = point.payload["doc_id"]
+        page_num = point.payload["page_num"]
+        source = store.path(doc_id, page_num)
+        if not os.path.exists(source):
+            continue
+        target = os.path.join(output_dir, f"{rank:02d}_match_doc_{doc_id}_page_{page_num}.png")
+        link_or_copy(source, target)
+        paths.append(target)
+    return paths
+
+
+def normalize_query(text):
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a query."""
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!.").strip().lower()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used map with hit/miss counters."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+class QueryCache:
+    """
+    Two-tier cache in front of query encoding and vector search.
+
+    1. normalized query text -> query embedding (saves a ColPali forward pass)
+    2. (embedding, limit, collection version) -> top-k hits (saves the search)
+
+    `invalidate()` bumps the collection version and drops the second tier;
+    pass it as `on_upsert` to `indexing.IndexingPipeline` so results never
+    outlive an index change.
+    """
+
+    def __init__(self, max_embeddings=1024, max_results=4096):
+        self.embeddings = LRUCache(max_embeddings)
+        self.results = LRUCache(max_results)
+        self.version = 0
+
+    def embedding(self, query, encode):
+        """Return the embedding of `query`, calling `encode(query)` on a miss."""
+        key = normalize_query(query)
+        embedding = self.embeddings.get(key)
+        if embedding is None:
+            embedding = np.asarray(encode(query), dtype=np.float32)
+            self.embeddings.put(key, embedding)
+        return embedding
+
+    def search(self, embedding, limit, search):
+        """Return the hits for `embedding`, calling `search(embedding, limit)` on a miss."""
+        digest = hashlib.sha1(np.ascontiguousarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+        key = (digest, limit, self.version)
+        hits = self.results.get(key)
+        if hits is None:
+            hits = list(search(embedding, limit))
+            self.results.put(key, hits)
+        return hits
+
+    def invalidate(self, *args):
+        self.version += 1
+        self.results.clear()
+
+    def stats(self):
+        return {"embeddings": self.embeddings.stats(), "results": self.results.stats(), "collection_version": self.version}
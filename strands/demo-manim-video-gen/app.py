@@ -1,39 +1,91 @@
 #!/usr/bin/env python3
-from mcp import stdio_client, StdioServerParameters
-from strands import Agent
-from strands_tools import file_read, file_write, speak
-from strands.models import BedrockModel
-from strands.tools.mcp import MCPClient
+# Heavy imports (strands, mcp, boto3) are deferred to main() so that the
+# dependency check and the help output do not pay for them.
+import hashlib
+import json
 import os
 import sys
 import subprocess
+import time
+from contextlib import ExitStack
+from importlib import metadata
 from pathlib import Path
 
-def check_and_install_packages():
+REQUIRED_PACKAGES = {
+    "strands-agents": "latest",
+    "manim": "latest",
+    "mcp": "latest"
+}
+
+# Successful dependency checks are remembered per lockfile hash
+DEPENDENCY_CHECK_CACHE = Path(__file__).resolve().parent / "output" / ".dependency_check.json"
+
+# Fast start: cached dependency check and the MCP server launched with this interpreter instead of `uv run`
+FAST_START = os.getenv("MANIM_CHAT_FAST_START", "0") == "1"
+
+# Conversation history resent per turn; older turns and generated scripts are folded into a running summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("MANIM_CHAT_HISTORY_TOKENS", "16000"))
+
+# Bedrock cache point type for the tool specs resent with every model call; "off" disables caching
+PROMPT_CACHE = os.getenv("MANIM_CHAT_PROMPT_CACHE", "default")
+
+def package_installed(package, in_process=False):
+    """Whether `package` is installed; in_process reads this interpreter's metadata instead of asking uv"""
+    if in_process:
+        try:
+            metadata.version(package)
+            return True
+        except metadata.PackageNotFoundError:
+            return False
+    # Ask uv about the project environment, which may differ from the interpreter running this script
+    result = subprocess.run(["uv", "pip", "show", package], capture_output=True)
+    return result.returncode == 0
+
+def check_and_install_packages(in_process=False):
     """Check and install required packages using uv"""
-    required_packages = {
-        "strands-agents": "latest",
-        "manim": "latest",
-        "mcp": "latest"
-    }
-    
     print("Checking and installing required packages...")
-    for package, version in required_packages.items():
-        try:
-            # Check if package is installed
-            subprocess.run(
-                ["uv", "pip", "show", package],
-                capture_output=True,
-                check=True
-            )
-        except subprocess.CalledProcessError:
+    for package, version in REQUIRED_PACKAGES.items():
+        if not package_installed(package, in_process):
             print(f"Installing {package}...")
+            install_spec = package if version == "latest" else f"{package}=={version}"
             subprocess.run(
-                ["uv", "pip", "install", f"{package}=={version}"],
+                ["uv", "pip", "install", install_spec],
                 check=True
             )
     print("Package installation complete!")
 
+def find_lockfile(start_dir):
+    """Return the nearest uv.lock at or above start_dir"""
+    for directory in [Path(start_dir), *Path(start_dir).parents]:
+        lockfile = directory / "uv.lock"
+        if lockfile.exists():
+            return lockfile
+    return None
+
+def dependency_fingerprint(start_dir):
+    """Hash of the lockfile and interpreter; changes whenever the environment may have changed"""
+    digest = hashlib.sha256(sys.executable.encode("utf-8"))
+    digest.update(json.dumps(REQUIRED_PACKAGES, sort_keys=True).encode("utf-8"))
+    lockfile = find_lockfile(start_dir)
+    if lockfile is not None:
+        digest.update(lockfile.read_bytes())
+    return digest.hexdigest()
+
+def check_packages_cached(start_dir):
+    """Run check_and_install_packages only if the lockfile changed since the last successful check"""
+    fingerprint = dependency_fingerprint(start_dir)
+    try:
+        if json.loads(DEPENDENCY_CHECK_CACHE.read_text()).get("fingerprint") == fingerprint:
+            print("Dependencies unchanged since last check, skipping package check.")
+            return
+    except (OSError, ValueError):
+        pass
+
+    # Fast start runs the MCP server with this interpreter, so its own metadata is what must be complete
+    check_and_install_packages(in_process=True)
+    DEPENDENCY_CHECK_CACHE.parent.mkdir(exist_ok=True)
+    DEPENDENCY_CHECK_CACHE.write_text(json.dumps({"fingerprint": fingerprint, "checked_at": time.time()}))
+
 def print_help():
     print("\n=== Manim Video Generation Chat Interface ===")
     print("Available commands:")
@@ -42,6 +94,8 @@ def print_help():
     print("  /samples  - Show sample prompts for demonstrations")
     print("  /install  - Install required packages using uv")
     print("  /status   - Check MCP server status")
+    print("  /memory   - Show how much conversation history is kept")
+    print("  /metrics  - Show latency percentiles of model calls, tool calls and turns, and prompt cache hits")
     print("  exit/bye  - Exit the program")
     print("\nYou can also:")
     print("  - Ask questions about Manim")
@@ -130,39 +184,81 @@ def ensure_output_directory():
     output_dir.mkdir(exist_ok=True)
     return output_dir
 
+def print_startup_report(timings, total):
+    """Print how long each startup step took"""
+    steps = ", ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items())
+    print(f"⏱️  Startup took {total:.2f}s ({steps})")
+
+def print_memory_stats(stats):
+    """Print the size of the history resent with every turn"""
+    print(f"🧠 History: {stats['retained_messages']} messages, ~{stats['retained_tokens']} of {stats['max_tokens']} tokens")
+    print(f"   {stats['summarized_messages']} older messages in a ~{stats['summary_tokens']}-token summary, "
+          f"{stats['truncated_payloads']} tool payloads shortened, {stats['compactions']} compactions")
+
 def main():
+    fast_start = FAST_START or "--fast-start" in sys.argv[1:]
+    startup_begin = time.perf_counter()
+    timings = {}
     try:
-        # Check and install required packages
-        check_and_install_packages()
-        
-        # Ensure output directory exists
-        output_dir = ensure_output_directory()
-        
         # Get the path to the manim_server.py
         current_dir = os.path.dirname(os.path.abspath(__file__))
         manim_server_path = os.path.join(current_dir, "src", "manim_server.py")
         os.chdir(current_dir)
 
+        # Check and install required packages
+        step_begin = time.perf_counter()
+        if fast_start:
+            check_packages_cached(current_dir)
+        else:
+            check_and_install_packages()
+        timings["dependencies"] = time.perf_counter() - step_begin
+        
+        # Ensure output directory exists
+        output_dir = ensure_output_directory()
+
+        step_begin = time.perf_counter()
+        from mcp import stdio_client, StdioServerParameters
+        from strands.tools.mcp import MCPClient
+        timings["imports"] = time.perf_counter() - step_begin
+
         # Connect to the Manim MCP server using stdio transport
-        manim_mcp_client = MCPClient(lambda: stdio_client(
-            StdioServerParameters(command="uv", args=["run", manim_server_path])
-        ))
+        if fast_start:
+            # Skips uv's environment sync; the server shares the environment the check above ran against,
+            # which is the uv project environment when the CLI itself was started with `uv run`
+            server_params = StdioServerParameters(command=sys.executable, args=[manim_server_path])
+        else:
+            server_params = StdioServerParameters(command="uv", args=["run", manim_server_path])
+        manim_mcp_client = MCPClient(lambda: stdio_client(server_params))
 
         print("Checking MCP server status...")
-        # Try to open the context to check if the server is running
+        # Open the connection once: listing the tools is the health check,
+        # and the same session is kept open for the chat loop
+        step_begin = time.perf_counter()
+        mcp_session = ExitStack()
         try:
-            with manim_mcp_client:
-                tools = manim_mcp_client.list_tools_sync()
+            mcp_session.enter_context(manim_mcp_client)
+            tools = manim_mcp_client.list_tools_sync()
         except Exception as e:
+            mcp_session.close()
             print("\nError: MCP server is not running!")
             print("Please start the MCP server first using:")
             print("uv run start_mcp_server.py")
             sys.exit(1)
+        timings["mcp server"] = time.perf_counter() - step_begin
 
         print("Initializing Manim Video Generation Chat Interface...")
-        # Now open the context for the actual chat loop
-        with manim_mcp_client:
-            tools = manim_mcp_client.list_tools_sync()
+        with mcp_session:
+            step_begin = time.perf_counter()
+            from strands import Agent
+            from strands.handlers.callback_handler import PrintingCallbackHandler
+            from strands.models import BedrockModel
+            from strands_tools import file_read, file_write, speak
+            # Modules shared by the Strands demos live in the parent directory
+            sys.path.append(os.path.dirname(current_dir))
+            from conversation_memory import TokenBudgetConversationManager
+            from instrumentation import METRICS, agent_hooks, configure_from_env
+            from prompt_cache import CacheUsage, cache_options
+            configure_from_env()
             
             # Show which model is being used
             print("🔍 Attempting to use default Strands model (usually AWS Bedrock)")
@@ -178,10 +274,20 @@ def main():
                         "type":"disabled",
                     }
                 },
+                # The chat agent has no system prompt, so only the tool specs get a cache point
+                **cache_options(PROMPT_CACHE, prompt=False),
             ) 
-            agent = Agent(model=model_id, tools=tools + [file_write, file_read, speak])
+            agent = Agent(
+                model=model_id,
+                tools=tools + [file_write, file_read, speak],
+                conversation_manager=TokenBudgetConversationManager(max_tokens=HISTORY_TOKEN_BUDGET),
+                callback_handler=CacheUsage(PrintingCallbackHandler()),
+                hooks=[agent_hooks()],
+            )
+            timings["agent"] = time.perf_counter() - step_begin
             print("✅ Initialization complete!")
             print(f"🤖 Using model: {agent.model}")
+            print_startup_report(timings, time.perf_counter() - startup_begin)
             print_help()
             
             print("\n🤖 Welcome to the Manim Video Generation Chat!")
@@ -230,6 +336,13 @@ def main():
                         except Exception:
                             print("❌ MCP server is not running")
                         continue
+                    elif user_input.lower() == '/memory':
+                        print_memory_stats(agent.conversation_manager.stats())
+                        continue
+                    elif user_input.lower() == '/metrics':
+                        print(METRICS.format_table())
+                        print(agent.callback_handler.format_summary())
+                        continue
                     
                     # Process user input with the agent
                     print("\n🤖 Agent: Processing your request...")
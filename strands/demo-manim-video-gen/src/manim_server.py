@@ -1,7 +1,17 @@
-import subprocess
+import asyncio
+import json
 import os
 import shutil
-from mcp.server.fastmcp import FastMCP
+import sys
+from mcp.server.fastmcp import Context, FastMCP
+
+from render_cache import RenderCache, manim_version
+from render_scheduler import RenderScheduler, SUCCEEDED, TIMED_OUT, CANCELLED
+from scene_render import quality_args
+
+# Shared latency metrics (strands/instrumentation.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from instrumentation import METRICS, configure_from_env
 
 # MCP server
 mcp = FastMCP()
@@ -9,43 +19,177 @@ mcp = FastMCP()
 # Get Manim executable path from environment variables or assume it's in the system PATH
 MANIM_EXECUTABLE = os.getenv("MANIM_EXECUTABLE", "manim")   
 
+# ffmpeg is used to join the clips of scenes rendered in parallel
+FFMPEG_EXECUTABLE = os.getenv("FFMPEG_EXECUTABLE", "ffmpeg")
+
+# Render pool settings
+MAX_CONCURRENT_RENDERS = int(os.getenv("MANIM_MAX_CONCURRENT_RENDERS", "2"))
+RENDER_TIMEOUT = float(os.getenv("MANIM_RENDER_TIMEOUT", "600"))
+
+# Render cache settings (set MANIM_RENDER_CACHE=0 to disable)
+RENDER_CACHE_ENABLED = os.getenv("MANIM_RENDER_CACHE", "1") != "0"
+RENDER_CACHE_MAX_MB = int(os.getenv("MANIM_RENDER_CACHE_MAX_MB", "2048"))
+
 # Manim output directory
 TEMP_DIRS = {}
-BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
+BASE_DIR = os.getenv("MANIM_OUTPUT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output"))
 os.makedirs(BASE_DIR, exist_ok=True)  
 
+# Identical scripts (ignoring comments and formatting) reuse the video in output/cache
+render_cache = None
+if RENDER_CACHE_ENABLED:
+    render_cache = RenderCache(
+        os.getenv("MANIM_RENDER_CACHE_DIR", os.path.join(BASE_DIR, "cache")),
+        max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024,
+        version=manim_version(MANIM_EXECUTABLE),
+    )
+
+# Metrics export and profiling use the MANIM_SERVER_ prefix (e.g. MANIM_SERVER_METRICS_PORT)
+configure_from_env(prefix="MANIM_SERVER_")
+
+
+def record_render(job):
+    """Record the queue wait and render time of a finished job"""
+    kind = "scenes" if job.scenes else "scene" if job.scene_name else "script"
+    if job.started_at:
+        METRICS.observe("render_queue", job.started_at - job.created_at, kind=kind)
+        METRICS.observe("render", job.finished_at - job.started_at, kind=kind, status=job.status, cached=job.cached)
+
+
+# Every render gets its own working directory under output/jobs/<job_id>
+scheduler = RenderScheduler(
+    MANIM_EXECUTABLE,
+    BASE_DIR,
+    max_workers=MAX_CONCURRENT_RENDERS,
+    timeout=RENDER_TIMEOUT,
+    cache=render_cache,
+    ffmpeg_executable=FFMPEG_EXECUTABLE,
+    on_finish=record_render,
+)
+
+
+def submit_render(manim_code, parallel_scenes=False, quality="default"):
+    """Queue a render, either of the whole script or of each scene in parallel"""
+    flags = quality_args(quality)
+    if parallel_scenes:
+        return scheduler.submit_scenes(manim_code, args=flags)
+    return scheduler.submit(manim_code, args=scheduler.manim_args + flags)
+
+
+def describe_result(job):
+    """Turn a finished job into the message returned to the agent"""
+    if job.status == SUCCEEDED and job.cached:
+        return f"Execution successful. Video generated at: {job.video_path} (from render cache)"
+    if job.status == SUCCEEDED:
+        TEMP_DIRS[job.workdir] = True
+        # stdout is the MCP transport, so log to stderr
+        print(f"Check the generated video at: {job.workdir}", file=sys.stderr)
+        return f"Execution successful. Video generated at: {job.video_path or job.workdir}"
+    if job.status == TIMED_OUT:
+        return f"Execution timed out: {job.error}"
+    if job.status == CANCELLED:
+        return f"Execution cancelled: {job.error}"
+    return f"Execution failed: {job.error}"
+
+
+async def wait_for_job(job, ctx=None):
+    """Wait for a job without blocking the event loop, forwarding its progress to the client"""
+    if ctx is not None:
+        async def report_progress(job):
+            await ctx.report_progress(job.progress, message=job.progress_message)
+
+        job.add_progress_listener(report_progress)
+    try:
+        return await scheduler.wait(job)
+    except asyncio.CancelledError:
+        # The tool call itself was cancelled, so stop the render as well
+        scheduler.cancel(job.job_id)
+        raise
+
+
 @mcp.tool()
-def execute_manim_code(manim_code: str) -> str:
-    """Execute the Manim code"""
-    tmpdir = os.path.join(BASE_DIR, "manim_tmp")  
-    os.makedirs(tmpdir, exist_ok=True)  # Ensure the temp folder exists
-    script_path = os.path.join(tmpdir, "scene.py")
-    
+async def execute_manim_code(manim_code: str, parallel_scenes: bool = False, quality: str = "default", ctx: Context = None) -> str:
+    """Execute the Manim code.
+
+    Set parallel_scenes=True to render every Scene class in its own process and
+    join them into one video. quality is "default", "draft" (fast low-resolution
+    preview, good for checking a script before the final render) or "final".
+    """
     try:
-        # Write the Manim script to the temp directory
-        with open(script_path, "w") as script_file:
-            script_file.write(manim_code)
-        
-        # Execute Manim with the correct path
-        result = subprocess.run(
-            [MANIM_EXECUTABLE, "-p", script_path], 
-            capture_output=True,
-            text=True,
-            cwd=tmpdir
-        )
-
-        if result.returncode == 0:
-            TEMP_DIRS[tmpdir] = True
-            print(f"Check the generated video at: {tmpdir}")
-
-            return "Execution successful. Video generated."
-        else:
-            return f"Execution failed: {result.stderr}"
+        job = submit_render(manim_code, parallel_scenes, quality)
+        # Wait without blocking the server so other tool calls are still served
+        await wait_for_job(job, ctx)
+        return describe_result(job)
 
     except Exception as e:
         return f"Error during execution: {str(e)}"
 
 
+@mcp.tool()
+async def submit_manim_job(manim_code: str, parallel_scenes: bool = False, quality: str = "default") -> str:
+    """Queue the Manim code for rendering and return a job id to poll with get_manim_job_status.
+
+    parallel_scenes and quality work as in execute_manim_code.
+    """
+    try:
+        job = submit_render(manim_code, parallel_scenes, quality)
+    except ValueError as e:
+        return f"Error during submission: {str(e)}"
+    return job.job_id
+
+
+@mcp.tool()
+def get_manim_job_status(job_id: str) -> str:
+    """Get the status of a render job (queued, running, succeeded, failed, cancelled or timed_out)"""
+    job = scheduler.get(job_id)
+    if job is None:
+        return f"Job not found: {job_id}"
+    return json.dumps(job.to_dict())
+
+
+@mcp.tool()
+async def get_manim_job_result(job_id: str, wait_seconds: float = 0) -> str:
+    """Get the result of a render job, optionally waiting up to wait_seconds for it to finish"""
+    job = scheduler.get(job_id)
+    if job is None:
+        return f"Job not found: {job_id}"
+    if not job.done and wait_seconds > 0:
+        await scheduler.wait(job, timeout=wait_seconds)
+    if not job.done:
+        return f"Job {job_id} is still {job.status}"
+    return describe_result(job)
+
+
+@mcp.tool()
+def cancel_manim_job(job_id: str) -> str:
+    """Cancel a queued or running render job"""
+    if scheduler.cancel(job_id):
+        return f"Cancellation requested for job: {job_id}"
+    return f"Job not found or already finished: {job_id}"
+
+
+@mcp.tool()
+def get_render_server_status() -> str:
+    """Get the render pool state: job counts and the progress of running renders"""
+    status = scheduler.stats()
+    if render_cache is not None:
+        status["cache"] = render_cache.stats()
+    return json.dumps(status)
+
+
+@mcp.tool()
+def get_render_cache_stats() -> str:
+    """Get render cache hit/miss counters and its current size"""
+    if render_cache is None:
+        return "Render cache is disabled"
+    return json.dumps(render_cache.stats())
+
+
+@mcp.tool()
+def get_render_metrics() -> str:
+    """Get p50/p95/p99 render and queue times (in seconds) since the server started"""
+    return json.dumps(METRICS.snapshot())
+
 
 @mcp.tool()
 def cleanup_manim_temp_dir(directory: str) -> str:
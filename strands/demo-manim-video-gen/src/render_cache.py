@@ -0,0 +1,150 @@
+import hashlib
+import io
+import os
+import shutil
+import threading
+import tokenize
+from collections import OrderedDict
+from importlib import metadata
+
+# Tokens that never change what a script renders
+_IGNORED_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER}
+
+
+def normalize_script(manim_code):
+    """
+    Reduce a script to the tokens that affect the render.
+
+    Comments, blank lines and spacing inside a line are dropped, so scripts
+    that differ only in formatting share a cache entry. Scripts that do not
+    tokenize fall back to a whitespace-trimmed copy of the source.
+    """
+    try:
+        tokens = tokenize.generate_tokens(io.StringIO(manim_code).readline)
+        return "\x00".join(
+            f"{tok.type}:{tok.string}" for tok in tokens if tok.type not in _IGNORED_TOKENS
+        )
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        lines = [line.rstrip() for line in manim_code.replace("\r\n", "\n").split("\n")]
+        return "\n".join(line for line in lines if line)
+
+
+def manim_version(manim_executable="manim"):
+    """Installed Manim version, or the executable path if it cannot be read."""
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return manim_executable
+
+
+class RenderCache:
+    """
+    Size-bounded, content-addressed store of rendered videos.
+
+    Videos live in `cache_dir` as `<key><ext>`, where the key hashes the
+    normalized script together with the Manim version and render flags.
+    When the total size exceeds `max_bytes` the least recently used videos
+    are deleted. File modification times carry the LRU order across restarts.
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3, version=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version or manim_version()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def key(self, manim_code, flags=()):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(" ".join(flags).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(normalize_script(manim_code).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached video path for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not os.path.exists(entry[0]):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            path = entry[0]
+        os.utime(path)
+        return path
+
+    def put(self, key, video_path):
+        """Copy a freshly rendered video into the cache and return the cached path."""
+        ext = os.path.splitext(video_path)[1] or ".mp4"
+        path = os.path.join(self.cache_dir, key + ext)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(video_path, tmp_path)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries[key][1]
+            self._entries[key] = (path, size)
+            self._entries.move_to_end(key)
+            self._bytes += size
+            self._evict()
+        return path
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "manim_version": self.version,
+            }
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key, remove_file=True)
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, os.path.splitext(name)[0], path, stat.st_size))
+        for _, key, path, size in sorted(files):
+            self._entries[key] = (path, size)
+            self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._drop(key, remove_file=True)
+            self.evictions += 1
+
+    def _drop(self, key, remove_file=False):
+        path, size = self._entries.pop(key)
+        self._bytes -= size
+        if remove_file:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,419 @@
+import asyncio
+import glob
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from scene_render import concat_videos, find_scene_classes
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED, TIMED_OUT}
+
+# Lines of Manim output kept per job; older lines are dropped instead of buffered
+OUTPUT_TAIL_LINES = 200
+
+# Manim prints "Animation 3 : ..." and tqdm bars such as " 45%|####5     | 27/60"
+ANIMATION_PATTERN = re.compile(r"Animation\s+(\d+)")
+PERCENT_PATTERN = re.compile(r"(\d{1,3})%\|")
+
+
+class RenderJob:
+    """One Manim render with its own working directory."""
+
+    def __init__(self, job_id, manim_code, workdir, args=(), scene_name=None):
+        self.job_id = job_id
+        self.manim_code = manim_code
+        self.workdir = workdir
+        self.args = list(args)
+        self.scene_name = scene_name
+        # Every Scene class, when a script with several is rendered as one job
+        self.scene_names = []
+        self.scenes = []
+        self.script_path = os.path.join(workdir, "scene.py")
+        self.status = QUEUED
+        self.returncode = None
+        self.output = deque(maxlen=OUTPUT_TAIL_LINES)
+        self.error = ""
+        self.video_path = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.process = None
+        self.cancel_requested = False
+        self.cache_key = None
+        self.cached = False
+        self.animation = 0
+        self.percent = 0
+        self.progress_message = ""
+        self.progress_listeners = []
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def command(self):
+        scenes = [self.scene_name] if self.scene_name else self.scene_names
+        return [*self.args, self.script_path, *scenes]
+
+    @property
+    def progress(self):
+        """Monotonic progress value: completed animations plus the fraction of the current one."""
+        if self.scenes:
+            return sum(scene.progress for scene in self.scenes)
+        return self.animation + self.percent / 100
+
+    def add_progress_listener(self, listener):
+        """Register `async listener(job)` to be awaited whenever the job's progress changes."""
+        self.progress_listeners.append(listener)
+
+    async def notify_progress(self):
+        for listener in list(self.progress_listeners):
+            try:
+                await listener(self)
+            except Exception:
+                # A client that went away must not break the render
+                pass
+
+    def to_dict(self):
+        duration = None
+        if self.started_at:
+            duration = round((self.finished_at or time.time()) - self.started_at, 3)
+        info = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "workdir": self.workdir,
+            "video_path": self.video_path,
+            "returncode": self.returncode,
+            "error": self.error,
+            "cached": self.cached,
+            "progress": round(self.progress, 2),
+            "progress_message": self.progress_message,
+            "queued_seconds": round((self.started_at or time.time()) - self.created_at, 3),
+            "render_seconds": duration,
+        }
+        if self.scene_name:
+            info["scene"] = self.scene_name
+        if self.scenes:
+            info["scenes"] = [scene.to_dict() for scene in self.scenes]
+        return info
+
+
+class RenderScheduler:
+    """
+    Run Manim renders as asyncio subprocesses, at most `max_workers` at a time.
+
+    Every job is written to a unique directory under `base_dir/jobs`, so
+    concurrent submissions never overwrite each other's script or media.
+    Further jobs wait in the queue. Manim's output is read line by line while
+    it renders, turned into progress updates and kept only as a short tail.
+    A running job is killed once it exceeds `timeout` seconds or when it is
+    cancelled. Finished jobs are remembered up to `max_history`.
+
+    Jobs are submitted from the event loop that serves the MCP tools, so a
+    long render never keeps the server from answering other requests.
+
+    With a RenderCache, a script whose key is already cached finishes at
+    submit time with the cached video, and successful renders are stored.
+
+    A script with several Scene classes submitted as one job renders all of
+    them in one Manim process; their clips are joined with ffmpeg in source
+    order, and the joined video is the job's result and cache entry.
+
+    submit_scenes() renders every Scene class of a script as its own job, so
+    the scenes share the worker pool in parallel, and joins the clips with
+    ffmpeg once the last one is done.
+    """
+
+    def __init__(self, manim_executable, base_dir, max_workers=2, timeout=600, max_history=200, manim_args=("-p",), cache=None, ffmpeg_executable="ffmpeg", on_finish=None):
+        self.manim_executable = manim_executable
+        self.base_dir = base_dir
+        self.jobs_dir = os.path.join(base_dir, "jobs")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_history = max_history
+        self.manim_args = list(manim_args)
+        self.cache = cache
+        self.ffmpeg_executable = ffmpeg_executable
+        # Called with every job once it reaches a final status, e.g. to record its timings
+        self.on_finish = on_finish
+        self._jobs = OrderedDict()
+        self._slots = asyncio.Semaphore(max_workers)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def submit(self, manim_code, args=None, scene_name=None):
+        """Queue a render and return its RenderJob immediately."""
+        job = self._new_job(manim_code, self.manim_args if args is None else args, scene_name)
+        loop = asyncio.get_running_loop()
+        if scene_name is None:
+            scene_names = find_scene_classes(manim_code)
+            if len(scene_names) > 1:
+                job.scene_names = scene_names
+
+        if self.cache is not None:
+            job.cache_key = self.cache.key(manim_code, [*job.args, scene_name or " ".join(job.scene_names)])
+            cached_path = self.cache.get(job.cache_key)
+            if cached_path:
+                job.video_path = cached_path
+                job.cached = True
+                job.started_at = job.created_at
+                self._finish(job, SUCCEEDED)
+                job.future = loop.create_future()
+                job.future.set_result(job)
+                return job
+
+        job.future = loop.create_task(self._run(job))
+        job.future.add_done_callback(lambda task: self._on_task_done(job, task))
+        return job
+
+    def submit_scenes(self, manim_code, args=()):
+        """
+        Render each Scene class of the script in its own process and concatenate the clips.
+
+        Returns a parent RenderJob whose `scenes` are the per-scene jobs. Scripts
+        with fewer than two scenes are rendered as a single job.
+        """
+        scene_names = find_scene_classes(manim_code)
+        if len(scene_names) < 2:
+            return self.submit(manim_code, args=args, scene_name=scene_names[0] if scene_names else None)
+
+        parent = self._new_job(manim_code, args)
+        parent.status = RUNNING
+        parent.started_at = time.time()
+        parent.scenes = [self.submit(manim_code, args=args, scene_name=name) for name in scene_names]
+
+        async def forward_progress(scene):
+            parent.progress_message = f"{scene.scene_name}: {scene.progress_message}"
+            await parent.notify_progress()
+
+        for scene in parent.scenes:
+            scene.add_progress_listener(forward_progress)
+        parent.future = asyncio.get_running_loop().create_task(self._join_scenes(parent))
+        return parent
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    async def wait(self, job, timeout=None):
+        """Wait until the job finishes (or `timeout` expires) and return it."""
+        try:
+            await asyncio.wait_for(asyncio.shield(job.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Only swallow the cancellation of the job itself, not of the waiter
+            if not job.future.cancelled():
+                raise
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a queued job or kill a running one. Returns False if it already finished."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_requested = True
+        if job.scenes:
+            for scene in job.scenes:
+                self.cancel(scene.job_id)
+            return True
+        job.future.cancel()
+        return True
+
+    def stats(self):
+        counts = {}
+        running = []
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+            if job.status == RUNNING and not job.scenes:
+                running.append({"job_id": job.job_id, "scene": job.scene_name, "progress": job.progress_message})
+        return {"max_workers": self.max_workers, "timeout": self.timeout, "jobs": counts, "running": running}
+
+    def shutdown(self):
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+
+    def _new_job(self, manim_code, args, scene_name=None):
+        job_id = uuid.uuid4().hex[:12]
+        job = RenderJob(job_id, manim_code, os.path.join(self.jobs_dir, job_id), args=args, scene_name=scene_name)
+        self._jobs[job_id] = job
+        self._trim_history()
+        return job
+
+    def _on_task_done(self, job, task):
+        # A task cancelled before its first step never enters _run, so record it here
+        if task.cancelled() and not job.done:
+            self._finish(job, CANCELLED, error="Cancelled before it started")
+
+    async def _run(self, job):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started_at = time.time()
+                await self._render(job)
+        except asyncio.CancelledError:
+            # Cancelling is an expected outcome of a job, so the task itself completes normally
+            self._finish(job, CANCELLED, error="Cancelled while rendering" if job.started_at else "Cancelled before it started")
+        except Exception as e:
+            self._finish(job, FAILED, error=str(e))
+        return job
+
+    async def _render(self, job):
+        os.makedirs(job.workdir, exist_ok=True)
+        with open(job.script_path, "w") as script_file:
+            script_file.write(job.manim_code)
+
+        process = job.process = await asyncio.create_subprocess_exec(
+            self.manim_executable,
+            *job.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=job.workdir,
+        )
+        readers = asyncio.gather(
+            self._read_output(job, process.stdout),
+            self._read_output(job, process.stderr),
+        )
+        timed_out = False
+        try:
+            await asyncio.wait_for(asyncio.shield(readers), timeout=self.timeout)
+            await process.wait()
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            # Also runs on cancellation: kill Manim and let the readers drain to EOF
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            await asyncio.gather(readers, return_exceptions=True)
+            job.process = None
+
+        if timed_out:
+            self._finish(job, TIMED_OUT, error=f"Render exceeded {self.timeout} seconds\n{self._tail(job)}")
+            return
+
+        job.returncode = process.returncode
+        if job.returncode != 0:
+            self._finish(job, FAILED, error=self._tail(job))
+            return
+
+        if job.scene_names:
+            clips = [find_video(job.workdir, name) for name in job.scene_names]
+            missing = [name for name, clip in zip(job.scene_names, clips) if clip is None]
+            if missing:
+                self._finish(job, FAILED, error=f"Manim wrote no video for {', '.join(missing)}\n{self._tail(job)}")
+                return
+            try:
+                job.video_path = await concat_videos(
+                    clips,
+                    os.path.join(job.workdir, "scenes.mp4"),
+                    ffmpeg_executable=self.ffmpeg_executable,
+                    timeout=self.timeout,
+                )
+            except (OSError, RuntimeError, asyncio.TimeoutError) as e:
+                self._finish(job, FAILED, error=f"Scenes rendered but could not be concatenated ({e}). Clips: {', '.join(clips)}")
+                return
+        else:
+            job.video_path = find_video(job.workdir)
+        if self.cache is not None and job.video_path:
+            job.video_path = await asyncio.to_thread(self.cache.put, job.cache_key, job.video_path)
+        self._finish(job, SUCCEEDED)
+
+    async def _read_output(self, job, stream):
+        """Consume a pipe as it is written, splitting on newlines and tqdm's carriage returns."""
+        pending = b""
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                break
+            lines = re.split(rb"[\r\n]", pending + chunk)
+            pending = lines.pop()
+            for line in lines:
+                await self._handle_line(job, line.decode("utf-8", errors="replace").rstrip())
+        if pending:
+            await self._handle_line(job, pending.decode("utf-8", errors="replace").rstrip())
+
+    async def _handle_line(self, job, line):
+        if not line:
+            return
+        job.output.append(line)
+
+        animation = ANIMATION_PATTERN.search(line)
+        percent = PERCENT_PATTERN.search(line)
+        if not animation and not percent:
+            return
+
+        changed = False
+        if animation and int(animation.group(1)) > job.animation:
+            job.animation = int(animation.group(1))
+            job.percent = 0
+            changed = True
+        if percent:
+            value = min(int(percent.group(1)), 100)
+            # Report in steps of 5% so clients are not flooded with notifications
+            if value >= job.percent + 5 or (value == 100 and job.percent != 100):
+                job.percent = value
+                changed = True
+        if changed:
+            job.progress_message = f"Animation {job.animation}: {job.percent}%"
+            await job.notify_progress()
+
+    async def _join_scenes(self, parent):
+        await asyncio.gather(*(scene.future for scene in parent.scenes), return_exceptions=True)
+
+        failed = [scene for scene in parent.scenes if scene.status != SUCCEEDED]
+        if failed:
+            status = CANCELLED if parent.cancel_requested else FAILED
+            errors = "\n".join(f"{scene.scene_name}: {scene.status} {scene.error.strip()}" for scene in failed)
+            self._finish(parent, status, error=errors)
+            return parent
+
+        clips = [scene.video_path for scene in parent.scenes]
+        try:
+            os.makedirs(parent.workdir, exist_ok=True)
+            parent.video_path = await concat_videos(
+                clips,
+                os.path.join(parent.workdir, "scenes.mp4"),
+                ffmpeg_executable=self.ffmpeg_executable,
+                timeout=self.timeout,
+            )
+            self._finish(parent, SUCCEEDED)
+        except Exception as e:
+            self._finish(parent, FAILED, error=f"Scenes rendered but could not be concatenated ({e}). Clips: {', '.join(clips)}")
+        return parent
+
+    def _tail(self, job):
+        return "\n".join(job.output)
+
+    def _finish(self, job, status, error=""):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job)
+            except Exception:
+                pass
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        excess = len(self._jobs) - self.max_history
+        for job_id in finished[:max(excess, 0)]:
+            del self._jobs[job_id]
+
+
+def find_video(workdir, scene_name=None):
+    """Return the most recently written video under a Manim media directory, or the newest one of `scene_name`."""
+    videos = glob.glob(os.path.join(workdir, "**", f"{scene_name}.mp4" if scene_name else "*.mp4"), recursive=True)
+    videos = [v for v in videos if "partial_movie_files" not in v]
+    if not videos:
+        return None
+    return max(videos, key=os.path.getmtime)
@@ -0,0 +1,67 @@
+import ast
+import asyncio
+import os
+
+# Manim quality flags for each render pass
+QUALITY_FLAGS = {
+    "default": [],
+    "draft": ["-ql"],
+    "final": ["-qh"],
+}
+
+
+def quality_args(quality):
+    """Manim flags for a quality name, raising ValueError for unknown names."""
+    try:
+        return list(QUALITY_FLAGS[quality])
+    except KeyError:
+        raise ValueError(f"Unknown quality '{quality}', expected one of: {', '.join(QUALITY_FLAGS)}")
+
+
+def find_scene_classes(manim_code):
+    """
+    Return the names of the Scene subclasses defined in a script, in source order.
+
+    A class counts as a scene when one of its bases is named like a Manim
+    scene (`Scene`, `MovingCameraScene`, `ThreeDScene`, ...) or is another
+    scene class from the same script. Scripts that do not parse return [].
+    """
+    try:
+        tree = ast.parse(manim_code)
+    except SyntaxError:
+        return []
+
+    scenes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for base in node.bases:
+            name = base.attr if isinstance(base, ast.Attribute) else getattr(base, "id", "")
+            if name.endswith("Scene") or name in scenes:
+                scenes.append(node.name)
+                break
+    return scenes
+
+
+async def concat_videos(video_paths, output_path, ffmpeg_executable="ffmpeg", timeout=600):
+    """Join clips with ffmpeg's concat demuxer without re-encoding them."""
+    list_path = os.path.splitext(output_path)[0] + "_clips.txt"
+    with open(list_path, "w") as list_file:
+        for path in video_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+
+    process = await asyncio.create_subprocess_exec(
+        ffmpeg_executable, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        process.kill()
+        await process.wait()
+        raise
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode("utf-8", errors="replace").strip() or f"ffmpeg exited with {process.returncode}")
+    return output_path
@@ -0,0 +1,106 @@
+"""
+RenderScheduler tests with stand-ins for the `manim` and `ffmpeg` executables.
+
+    python -m pytest test_render_scheduler.py
+"""
+import asyncio
+import os
+import stat
+import sys
+
+import pytest
+
+from render_cache import RenderCache
+from render_scheduler import SUCCEEDED, RenderScheduler
+
+# Writes media/videos/scene/<Scene>.mp4 containing the scene name for every scene on the command line,
+# or for the only scene of the script; like Manim, it refuses to guess between several scenes
+FAKE_MANIM = """
+import os, re, sys
+positional = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+script = next(arg for arg in positional if arg.endswith(".py"))
+scenes = positional[positional.index(script) + 1 :] or re.findall(r"^class (\\w+)\\(", open(script).read(), re.M)
+if len(scenes) != 1 and len(positional) == 1:
+    sys.exit("fake manim: choose a scene")
+output_dir = os.path.join("media", "videos", "scene")
+os.makedirs(output_dir, exist_ok=True)
+for scene in scenes:
+    with open(os.path.join(output_dir, scene + ".mp4"), "w") as f:
+        f.write(scene + ";")
+"""
+
+# Joins the files of an ffmpeg concat list into the output file
+FAKE_FFMPEG = """
+import sys
+list_path, output_path = sys.argv[sys.argv.index("-i") + 1], sys.argv[-1]
+with open(output_path, "w") as output:
+    for line in open(list_path):
+        output.write(open(line.strip()[len("file '") : -1]).read())
+"""
+
+TWO_SCENES = """from manim import *
+
+class Intro(Scene):
+    def construct(self):
+        self.play(Create(Circle()))
+
+class Outro(Scene):
+    def construct(self):
+        self.play(Create(Square()))
+"""
+
+ONE_SCENE = """from manim import *
+
+class Intro(Scene):
+    def construct(self):
+        self.play(Create(Circle()))
+"""
+
+
+def executable(path, source):
+    path.write_text(f"#!{sys.executable}\n{source}")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return RenderScheduler(
+        executable(tmp_path / "manim", FAKE_MANIM),
+        str(tmp_path / "output"),
+        manim_args=(),
+        cache=RenderCache(str(tmp_path / "cache"), version="test"),
+        ffmpeg_executable=executable(tmp_path / "ffmpeg", FAKE_FFMPEG),
+    )
+
+
+def render(scheduler, manim_code):
+    async def run():
+        job = scheduler.submit(manim_code)
+        return await scheduler.wait(job)
+
+    return asyncio.run(run())
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_two_scene_script_keeps_both_scenes(scheduler):
+    job = render(scheduler, TWO_SCENES)
+    assert job.status == SUCCEEDED, job.error
+    assert job.scene_names == ["Intro", "Outro"]
+    assert read(job.video_path) == "Intro;Outro;"
+
+    cached = render(scheduler, TWO_SCENES)
+    assert cached.cached
+    assert read(cached.video_path) == "Intro;Outro;"
+
+
+def test_single_scene_script_is_rendered_as_is(scheduler):
+    job = render(scheduler, ONE_SCENE)
+    assert job.status == SUCCEEDED, job.error
+    assert job.scene_names == []
+    assert read(job.video_path) == "Intro;"
+    assert not os.path.exists(os.path.join(job.workdir, "scenes.mp4"))
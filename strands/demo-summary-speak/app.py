@@ -1,7 +1,33 @@
+import argparse
+import os
+import sys
+
 from strands import Agent
 from strands.models import BedrockModel
 
-from strands_tools import file_read, file_write, speak
+from strands_tools import file_read, file_write
+
+from batch import RateLimiter, format_report, rate_limited, summarize_directory
+from summarize import BedrockBackend, LocalBackend, MapReduceSummarizer, summarize_file
+
+# Shared latency metrics and speech (../instrumentation.py, ../speech.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import METRICS, agent_hooks, configure_from_env
+from speech import default_pipeline, speak
+
+parser = argparse.ArgumentParser(description="Summarize a document and speak the summary")
+parser.add_argument("path", nargs="?", default="docs/chapter10.txt", help="Text file, or directory of files to summarize in batch")
+parser.add_argument("--chunk-tokens", type=int, default=2000, help="Token budget for each summarization call")
+parser.add_argument("--workers", type=int, default=4, help="Summarization calls to run in parallel per document")
+parser.add_argument("--batch-workers", type=int, default=4, help="Documents to summarize in parallel in batch mode")
+parser.add_argument("--rate", type=float, default=0, help="Maximum model calls per second, 0 for no limit")
+parser.add_argument("--pattern", default="*.txt", help="Files to pick up in batch mode")
+parser.add_argument("--local", action="store_true", help="Use the offline stand-in model instead of Bedrock")
+parser.add_argument("--no-speak", action="store_true", help="Only write the summary, do not speak it")
+parser.add_argument("--metrics", action="store_true", help="Print per-stage latency percentiles at the end")
+args = parser.parse_args()
+
+configure_from_env()
 
 # Step 1: Define the model
 model_id = BedrockModel(
@@ -40,11 +66,44 @@ agent = Agent(
         file_write,
         speak,
     ],
+    hooks=[agent_hooks()],
 )
 
-# Step 4: Run the agent
-agent("What is the content of the file 'chapter10.txt' located in the 'docs' directory and summarize it in less than 100 words? \
-    And save the file in Markdown format in the 'results' directory, \
-    If the folder 'results' does not exist, create it. \
-    If the file 'chapter10.md' already exists, overwrite it. \
-    And finally also speak out the summary you have created. Make sure the voice is very natural and not robotic.")
+# Step 4: Summarize the document in parallel chunks and save the Markdown in 'results'
+backend = LocalBackend() if args.local else BedrockBackend(model=model_id)
+# Timed inside the rate limiter, so the histogram holds model latency without queueing
+backend = METRICS.timed("model", backend, caller="summarize")
+backend = rate_limited(backend, RateLimiter(args.rate, burst=args.workers) if args.rate > 0 else None)
+
+# Time every speech synthesis call
+speech_pipeline = default_pipeline()
+speech_pipeline.synthesizer = METRICS.timed("tts", speech_pipeline.synthesizer)
+
+
+def make_summarizer():
+    return MapReduceSummarizer(backend, chunk_tokens=args.chunk_tokens, max_workers=args.workers)
+
+
+if os.path.isdir(args.path):
+    # Batch mode: one process for the whole directory, unchanged files are skipped
+    settings = f"{'local' if args.local else model_id.config['model_id']}:{args.chunk_tokens}"
+    report = summarize_directory(
+        args.path,
+        make_summarizer,
+        results_dir="results",
+        pattern=args.pattern,
+        workers=args.batch_workers,
+        settings=settings,
+    )
+    print(format_report(report))
+else:
+    summarizer = make_summarizer()
+    summary, output_path = summarize_file(args.path, summarizer, results_dir="results")
+    print(f"Summary saved to {output_path} ({summarizer.stats})")
+
+    # Step 5: Speak out the summary with a natural voice, sentence by sentence
+    if not args.no_speak:
+        agent.tool.speak(text=summary)
+
+if args.metrics:
+    print(METRICS.format_table())
@@ -0,0 +1,179 @@
+"""
+Batch summarization of a directory of documents in a single process.
+
+Files are summarized concurrently by `workers` threads sharing one model
+backend, with every model call going through a `RateLimiter`. Each summary is
+written to `results/<relative path>.md`, and a manifest of content hashes in
+`results/.manifest.json` lets a rerun skip files that have not changed since
+they were last summarized, so an interrupted run resumes where it stopped.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from summarize import summarize_file
+
+# Shared helpers (../instrumentation.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import percentile
+
+MANIFEST_NAME = ".manifest.json"
+
+# Write the manifest after this many finished files, so a crash loses little work
+MANIFEST_SAVE_EVERY = 20
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second with bursts of up to `burst` calls."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def rate_limited(backend, limiter):
+    """Wrap a model backend so every call first waits for the limiter."""
+    if limiter is None:
+        return backend
+
+    def call(prompt, *args, **kwargs):
+        limiter.acquire()
+        return backend(prompt, *args, **kwargs)
+
+    return call
+
+
+def file_digest(path, settings=""):
+    """sha256 of a file's content together with the settings that shape its summary."""
+    digest = hashlib.sha256(settings.encode("utf-8"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Content hashes of the files already summarized, stored as JSON next to the results."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+
+    def is_current(self, name, digest, output_path):
+        entry = self.entries.get(name)
+        return entry is not None and entry["sha256"] == digest and os.path.exists(output_path)
+
+    def record(self, name, digest, output_path, seconds):
+        with self._lock:
+            self.entries[name] = {"sha256": digest, "output": output_path, "seconds": round(seconds, 3)}
+            self._unsaved += 1
+            if self._unsaved >= MANIFEST_SAVE_EVERY:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+
+def summarize_directory(
+    source_dir,
+    make_summarizer,
+    results_dir="results",
+    pattern="*.txt",
+    workers=4,
+    settings="",
+):
+    """
+    Summarize every file matching `pattern` under `source_dir`.
+
+    `make_summarizer()` is called once per file, so summarizers do not share
+    per-run state across threads. `settings` is mixed into the content hashes:
+    changing it (e.g. a different chunk size or model) re-summarizes everything.
+    Returns a report dict, see `format_report`.
+    """
+    source = Path(source_dir)
+    files = sorted(path for path in source.rglob(pattern) if path.is_file())
+    os.makedirs(results_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(results_dir, MANIFEST_NAME))
+
+    report = {"files": len(files), "summarized": 0, "skipped": 0, "failures": {}, "latencies": []}
+    pending = []
+    for path in files:
+        name = path.relative_to(source).as_posix()
+        output_dir = os.path.join(results_dir, os.path.dirname(name))
+        output_path = os.path.join(output_dir, path.stem + ".md")
+        digest = file_digest(path, settings)
+        if manifest.is_current(name, digest, output_path):
+            report["skipped"] += 1
+        else:
+            pending.append((name, path, output_dir, digest))
+
+    def run(name, path, output_dir, digest):
+        start = time.perf_counter()
+        _, output_path = summarize_file(str(path), make_summarizer(), results_dir=output_dir)
+        seconds = time.perf_counter() - start
+        manifest.record(name, digest, output_path, seconds)
+        return seconds
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run, *item): item[0] for item in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    report["latencies"].append(future.result())
+                    report["summarized"] += 1
+                except Exception as e:
+                    report["failures"][name] = str(e)
+    finally:
+        manifest.save()
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def format_report(report):
+    seconds = report["seconds"]
+    latencies = report["latencies"]
+    lines = [
+        f"Files: {report['files']} | summarized: {report['summarized']} | "
+        f"skipped (unchanged): {report['skipped']} | failed: {len(report['failures'])}",
+        f"Wall time: {seconds:.1f}s | throughput: {report['summarized'] / seconds if seconds else 0.0:.2f} docs/s",
+        f"Latency per document: p50 {percentile(latencies, 50):.2f}s | p95 {percentile(latencies, 95):.2f}s",
+    ]
+    for name, error in sorted(report["failures"].items()):
+        lines.append(f"  FAILED {name}: {error}")
+    return "\n".join(lines)
@@ -0,0 +1,206 @@
+"""
+Map-reduce summarization for documents that are too large for one model call.
+
+The document is split into token-bounded chunks, every chunk is summarized
+concurrently (at most `max_workers` model calls in flight), and the partial
+summaries are merged level by level until a single Markdown summary remains.
+
+The model is a plain callable `backend(prompt, system_prompt) -> str`, so the
+pipeline runs against Bedrock (`BedrockBackend`) or fully offline against
+`LocalBackend`, an extractive stand-in used for testing.
+"""
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared token estimate (../token_count.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from token_count import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+
+SYSTEM_PROMPT = "You are a precise summarizer. Reply with the summary only, without any preamble."
+
+CHUNK_PROMPT = """Summarize this part ({index} of {total}) of a longer document.
+Keep the key facts, names and arguments; drop examples and repetition.
+
+{text}"""
+
+REDUCE_PROMPT = """These are summaries of consecutive parts of one document.
+Merge them into a single summary that keeps the key points in order.
+
+{text}"""
+
+FINAL_PROMPT = """Write a summary of the following document in less than {words} words.
+Format it as Markdown with a short title.
+
+{text}"""
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_chunks(text, max_tokens=2000, count_tokens=estimate_tokens):
+    """
+    Split text into chunks of at most `max_tokens` tokens.
+
+    Chunks break on paragraph boundaries where possible, then on sentences,
+    and only split inside a sentence (on words) when a single sentence is
+    larger than the budget.
+    """
+    pieces = []
+    for paragraph in _PARAGRAPH_SPLIT.split(text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            if count_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_split_words(sentence, max_tokens, count_tokens))
+    return _pack(pieces, max_tokens, count_tokens)
+
+
+def _split_words(text, max_tokens, count_tokens):
+    # Words longer than the whole budget (e.g. base64 blobs) are cut by length
+    width = max_tokens * CHARS_PER_TOKEN
+    words = [word[i : i + width] for word in text.split() for i in range(0, len(word), width)]
+    return _pack(words, max_tokens, count_tokens, separator=" ")
+
+
+def _pack(pieces, max_tokens, count_tokens, separator="\n\n"):
+    """Greedily join consecutive pieces while they stay within the budget."""
+    chunks, current = [], []
+    for piece in pieces:
+        candidate = separator.join(current + [piece])
+        if current and count_tokens(candidate) > max_tokens:
+            chunks.append(separator.join(current))
+            current = [piece]
+        else:
+            current.append(piece)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+class BedrockBackend:
+    """Summarize with a Bedrock model through a fresh, tool-less Strands agent per call."""
+
+    def __init__(self, model_id=DEFAULT_MODEL_ID, max_tokens=4096, model=None):
+        if model is None:
+            from strands.models import BedrockModel
+
+            model = BedrockModel(
+                model_id=model_id,
+                max_tokens=max_tokens,
+                additional_request_fields={
+                    "thinking": {
+                        "type": "disabled",
+                    }
+                },
+            )
+        self.model = model
+
+    def __call__(self, prompt, system_prompt=SYSTEM_PROMPT):
+        from strands import Agent
+
+        # A new agent per call keeps the calls independent and safe to run in parallel
+        agent = Agent(model=self.model, system_prompt=system_prompt, callback_handler=None)
+        return str(agent(prompt)).strip()
+
+
+class LocalBackend:
+    """
+    Offline stand-in for a model: keeps the leading sentences of the prompt text.
+
+    `delay` simulates model latency in seconds, which makes the effect of
+    `max_workers` visible without calling Bedrock.
+    """
+
+    def __init__(self, words=60, delay=0.0):
+        self.words = words
+        self.delay = delay
+
+    def __call__(self, prompt, system_prompt=SYSTEM_PROMPT):
+        if self.delay:
+            time.sleep(self.delay)
+        text = prompt.split("\n\n", 1)[-1]
+        summary, count = [], 0
+        for sentence in _SENTENCE_SPLIT.split(" ".join(text.split())):
+            if summary and count + len(sentence.split()) > self.words:
+                break
+            summary.append(sentence)
+            count += len(sentence.split())
+        return " ".join(summary)
+
+
+class MapReduceSummarizer:
+    """
+    Summarize arbitrarily long text with many small model calls.
+
+    `chunk_tokens` bounds the text sent in each call and `max_workers` the
+    number of calls in flight. Documents that fit in one chunk take a single
+    call, exactly like summarizing them directly.
+    """
+
+    def __init__(self, backend, chunk_tokens=2000, max_workers=4, final_words=100, count_tokens=estimate_tokens):
+        self.backend = backend
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.final_words = final_words
+        self.count_tokens = count_tokens
+        self.stats = {}
+
+    def summarize(self, text):
+        start = time.perf_counter()
+        chunks = split_chunks(text, self.chunk_tokens, self.count_tokens)
+        self.stats = {"chunks": len(chunks), "levels": 0, "calls": 0}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            parts = chunks
+            if len(chunks) > 1:
+                total = len(chunks)
+                prompts = [CHUNK_PROMPT.format(index=i + 1, total=total, text=chunk) for i, chunk in enumerate(chunks)]
+                parts = self._run(executor, prompts)
+                self.stats["levels"] += 1
+
+            # Merge neighbouring summaries until they fit in a single call
+            while len(parts) > 1:
+                groups = _pack(parts, self.chunk_tokens, self.count_tokens)
+                if len(groups) == 1:
+                    parts = groups
+                    break
+                if len(groups) == len(parts):
+                    # Summaries too large to pair up: merge them two at a time regardless
+                    groups = ["\n\n".join(parts[i : i + 2]) for i in range(0, len(parts), 2)]
+                parts = self._run(executor, [REDUCE_PROMPT.format(text=group) for group in groups])
+                self.stats["levels"] += 1
+
+        summary = self.backend(FINAL_PROMPT.format(words=self.final_words, text=parts[0] if parts else ""))
+        self.stats["levels"] += 1
+        self.stats["calls"] += 1
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        return summary
+
+    def _run(self, executor, prompts):
+        self.stats["calls"] += len(prompts)
+        # map() keeps results in document order
+        return list(executor.map(self.backend, prompts))
+
+
+def summarize_file(path, summarizer, results_dir="results"):
+    """Summarize a text file and write the Markdown to `results_dir/<name>.md`."""
+    with open(path, encoding="utf-8") as f:
+        summary = summarizer.summarize(f.read())
+
+    os.makedirs(results_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0]
+    output_path = os.path.join(results_dir, f"{name}.md")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(summary.rstrip() + "\n")
+    return summary, output_path
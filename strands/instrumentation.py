@@ -0,0 +1,448 @@
+"""
+Per-stage latency metrics for the demos.
+
+Every timed stage (model calls, tool calls, retrieval, embedding, rendering,
+TTS, whole agent requests) goes into a histogram in `METRICS`, labelled by
+stage and a few low-cardinality labels. Histograms use fixed log-spaced
+buckets, so recording is O(1) and memory stays constant under load, and
+p50/p95/p99 are read from the buckets.
+
+Ways to get the numbers out, all opt-in:
+
+- `serve(port)`: a local HTTP endpoint with `/metrics` in the Prometheus
+  text format and `/metrics.json` with the percentiles per stage
+- `RotatingFileExporter`: one JSON snapshot per interval in a size-rotated file
+- `SlowRequestProfiler`: samples the stacks of running requests and writes a
+  collapsed-stack profile (for flamegraph.pl or speedscope) of every request
+  slower than a threshold
+
+`configure_from_env()` turns these on from environment variables, and
+`agent_hooks()` records agent, model and tool latencies of a strands Agent.
+"""
+import bisect
+import collections
+import json
+import logging
+import logging.handlers
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bucket upper bounds in seconds: 1 ms to about 20 minutes, 25% apart (so percentiles are within ~12%)
+DEFAULT_BUCKETS = tuple(round(0.001 * 1.25**i, 6) for i in range(64))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(values, q):
+    """Exact nearest-rank percentile of a list of numbers (q in 0..100), or 0.0 when there are none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class Histogram:
+    """Latency histogram with fixed buckets; thread-safe."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket, like Prometheus' histogram_quantile."""
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else largest
+                return min(largest, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return largest
+
+    def summary(self):
+        with self._lock:
+            count, total, largest = self.count, self.sum, self.max
+        summary = {"count": count, "mean": total / count if count else 0.0, "max": largest}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = self.quantile(q)
+        return summary
+
+
+class Timed:
+    """A callable wrapped so every call is recorded under a stage; other attributes pass through."""
+
+    def __init__(self, metrics, stage, fn, labels):
+        self._metrics = metrics
+        self._stage = stage
+        self._fn = fn
+        self._labels = labels
+
+    def __call__(self, *args, **kwargs):
+        with self._metrics.time(self._stage, **self._labels):
+            return self._fn(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._fn, name)
+
+
+class Metrics:
+    """Registry of latency histograms keyed by stage and labels."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage, **labels):
+        key = (stage, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            return histogram
+
+    def observe(self, stage, seconds, **labels):
+        self.histogram(stage, **labels).observe(seconds)
+
+    @contextmanager
+    def time(self, stage, **labels):
+        """Record the duration of the block; a block that raises is labelled `status="error"`."""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, status=status, **labels)
+
+    def timed(self, stage, fn, **labels):
+        """Wrap a callable (a summarization backend, a TTS synthesizer, ...) so its calls are recorded."""
+        return Timed(self, stage, fn, labels)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def snapshot(self):
+        """Count, mean, max and p50/p95/p99 (in seconds) of every stage and label set."""
+        return [{"stage": stage, "labels": dict(labels), **histogram.summary()} for (stage, labels), histogram in self._items()]
+
+    def stage_summary(self):
+        """Like snapshot(), but merged across labels: one entry per stage."""
+        merged = {}
+        for (stage, _), histogram in self._items():
+            target = merged.setdefault(stage, Histogram(self.buckets))
+            with histogram._lock:
+                for index, count in enumerate(histogram.counts):
+                    target.counts[index] += count
+                target.count += histogram.count
+                target.sum += histogram.sum
+                target.max = max(target.max, histogram.max)
+        return {stage: histogram.summary() for stage, histogram in merged.items()}
+
+    def format_table(self):
+        lines = [f"{'stage':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for stage, s in sorted(self.stage_summary().items()):
+            lines.append(
+                f"{stage:<12}{s['count']:>8}{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def prometheus_text(self, name="stage_duration_seconds"):
+        """All histograms in the Prometheus text exposition format."""
+        lines = [f"# HELP {name} Latency of each processing stage.", f"# TYPE {name} histogram"]
+        for (stage, labels), histogram in self._items():
+            with histogram._lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in (("stage", stage), *labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{label_text}}} {total}")
+            lines.append(f"{name}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+
+
+# Export
+
+
+def serve(port, metrics=METRICS, host="127.0.0.1"):
+    """Serve `/metrics` (Prometheus text) and `/metrics.json` on a background thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(metrics.snapshot()).encode("utf-8"), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = metrics.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class RotatingFileExporter:
+    """Append a JSON snapshot of `metrics` to `path` every `interval` seconds, rotating by size."""
+
+    def __init__(self, path, metrics=METRICS, interval=60.0, max_bytes=10 * 1024 * 1024, backups=5):
+        self.metrics = metrics
+        self.interval = interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        record = {"time": time.time(), "stages": self.metrics.snapshot()}
+        self._handler.emit(logging.makeLogRecord({"msg": json.dumps(record), "levelno": logging.INFO}))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+        self._handler.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+
+# Profiling
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler for slow requests.
+
+    While a request runs (between `begin()` and `end()`, or inside
+    `request()`), a background thread samples the stack of the thread that
+    started it every `interval` seconds. When the request took longer than
+    `threshold` seconds, its samples are written to `output_dir` as a
+    collapsed-stack file; faster requests are discarded. Samples are per
+    thread, so on an event loop thread they include whatever else the loop
+    was running at the time.
+    """
+
+    def __init__(self, threshold=5.0, interval=0.005, output_dir="profiles", max_profiles=100):
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self.written = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, name="request"):
+        token = object()
+        with self._lock:
+            self._active[token] = (threading.get_ident(), time.perf_counter(), name, collections.Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        return token
+
+    def end(self, token):
+        """Finish a request; returns the profile path if it was slow enough to be written."""
+        with self._lock:
+            entry = self._active.pop(token, None)
+        if entry is None:
+            return None
+        _, start, name, samples = entry
+        seconds = time.perf_counter() - start
+        if seconds < self.threshold or not samples or self.written >= self.max_profiles:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{seconds * 1000:.0f}ms.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.written += 1
+        return path
+
+    @contextmanager
+    def request(self, name="request"):
+        token = self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(token)
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.values())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, _, _, samples in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[_collapse(frame)] += 1
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+PROFILER = None
+
+
+# strands integration
+
+
+class AgentMetricsHooks:
+    """
+    strands hook provider recording `agent` (whole invocations), `model` and
+    `tool` latencies into `metrics`, and profiling slow invocations with
+    `profiler` when one is given.
+    """
+
+    def __init__(self, metrics=METRICS, profiler=None):
+        self.metrics = metrics
+        self.profiler = profiler
+        self._starts = {}
+
+    def register_hooks(self, registry, **kwargs):
+        from strands.hooks import AfterInvocationEvent, BeforeInvocationEvent
+
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+        registry.add_callback(AfterInvocationEvent, self._after_invocation)
+        try:
+            from strands.experimental.hooks import (
+                AfterModelInvocationEvent,
+                AfterToolInvocationEvent,
+                BeforeModelInvocationEvent,
+                BeforeToolInvocationEvent,
+            )
+        except ImportError:
+            return
+        registry.add_callback(BeforeModelInvocationEvent, self._before_model)
+        registry.add_callback(AfterModelInvocationEvent, self._after_model)
+        registry.add_callback(BeforeToolInvocationEvent, self._before_tool)
+        registry.add_callback(AfterToolInvocationEvent, self._after_tool)
+
+    def _before_invocation(self, event):
+        token = self.profiler.begin(event.agent.name or "agent") if self.profiler else None
+        self._starts[("agent", id(event.agent))] = (time.perf_counter(), token)
+
+    def _after_invocation(self, event):
+        start, token = self._starts.pop(("agent", id(event.agent)), (None, None))
+        if token is not None:
+            self.profiler.end(token)
+        if start is not None:
+            self.metrics.observe("agent", time.perf_counter() - start)
+
+    def _before_model(self, event):
+        self._starts[("model", id(event.agent))] = time.perf_counter()
+
+    def _after_model(self, event):
+        start = self._starts.pop(("model", id(event.agent)), None)
+        if start is not None:
+            model_id = getattr(event.agent.model, "config", {}).get("model_id", "unknown")
+            status = "error" if event.exception else "ok"
+            self.metrics.observe("model", time.perf_counter() - start, model=model_id, status=status)
+
+    def _before_tool(self, event):
+        self._starts[("tool", event.tool_use["toolUseId"])] = time.perf_counter()
+
+    def _after_tool(self, event):
+        start = self._starts.pop(("tool", event.tool_use["toolUseId"]), None)
+        if start is not None:
+            status = "error" if event.exception or event.result.get("status") == "error" else "ok"
+            self.metrics.observe("tool", time.perf_counter() - start, tool=event.tool_use["name"], status=status)
+
+
+def agent_hooks():
+    """Hook provider for `Agent(hooks=[...])` that records into METRICS and profiles with PROFILER."""
+    return AgentMetricsHooks(METRICS, PROFILER)
+
+
+def configure_from_env(prefix=""):
+    """
+    Start the exporters and the profiler selected by environment variables:
+
+    - `<prefix>METRICS_PORT`: serve /metrics on this local port
+    - `<prefix>METRICS_FILE`: write snapshots to this file (every
+      `<prefix>METRICS_FILE_INTERVAL` seconds, default 60)
+    - `<prefix>PROFILE_SLOW_SECONDS`: profile requests slower than this into
+      `<prefix>PROFILE_DIR` (default `profiles`)
+
+    Returns the list of things that were started.
+    """
+    global PROFILER
+    started = []
+    port = os.getenv(f"{prefix}METRICS_PORT")
+    if port:
+        started.append(serve(int(port)))
+    path = os.getenv(f"{prefix}METRICS_FILE")
+    if path:
+        interval = float(os.getenv(f"{prefix}METRICS_FILE_INTERVAL", "60"))
+        started.append(RotatingFileExporter(path, interval=interval).start())
+    threshold = os.getenv(f"{prefix}PROFILE_SLOW_SECONDS")
+    if threshold:
+        PROFILER = SlowRequestProfiler(float(threshold), output_dir=os.getenv(f"{prefix}PROFILE_DIR", "profiles"))
+        started.append(PROFILER)
+    return started
@@ -0,0 +1,108 @@
+"""
+Prompt caching for the static prefix of agent requests.
+
+Every model call of an agent resends the same tool specifications and system
+prompt ahead of the conversation. Bedrock can cache that prefix: a
+`cachePoint` block after the tool list and one after the system prompt mark
+everything before them as cacheable, and later calls starting with the same
+prefix read it from the cache instead of processing it again. strands'
+`BedrockModel` adds these cache points when it is created with `cache_tools`
+and `cache_prompt`, which `cache_options()` fills in.
+
+A prefix is only cached once it reaches the model's minimum size (1,024
+tokens for Claude 3.7 Sonnet); shorter prefixes are processed as usual. A
+cache entry expires five minutes after its last use.
+
+strands does not keep the cache counters of the usage Bedrock reports, so
+`CacheUsage`, a callback handler, adds up `cacheReadInputTokens` and
+`cacheWriteInputTokens` of every model call to confirm the hits.
+"""
+import threading
+
+DEFAULT_CACHE_TYPE = "default"
+DISABLED = {"", "0", "off", "false", "none"}
+
+# Bedrock usage fields and the names they are reported under
+USAGE_FIELDS = {
+    "inputTokens": "input_tokens",
+    "cacheReadInputTokens": "cache_read_tokens",
+    "cacheWriteInputTokens": "cache_write_tokens",
+    "outputTokens": "output_tokens",
+}
+
+
+def cache_options(cache_type=DEFAULT_CACHE_TYPE, tools=True, prompt=True):
+    """
+    Keyword arguments for `BedrockModel(...)` that put a cache point after the
+    tool specs and one after the system prompt. Pass `prompt=False` for agents
+    without a system prompt. Returns no options when `cache_type` is empty or
+    "off", so an environment variable can turn caching off.
+    """
+    if cache_type is None or str(cache_type).strip().lower() in DISABLED:
+        return {}
+    options = {}
+    if tools:
+        options["cache_tools"] = cache_type
+    if prompt:
+        options["cache_prompt"] = cache_type
+    return options
+
+
+class CacheUsage:
+    """
+    strands callback handler adding up the token usage of every model call,
+    split into uncached input, cache reads and cache writes.
+
+    Every event is passed on to `handler` first (e.g. the
+    PrintingCallbackHandler the agent would use otherwise). Usage is also
+    added to `parent`, so one CacheUsage per agent can feed a shared total.
+    """
+
+    def __init__(self, handler=None, parent=None):
+        self.handler = handler
+        self.parent = parent
+        self.calls = 0
+        self.totals = dict.fromkeys(USAGE_FIELDS.values(), 0)
+        self.last_call = None
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        if self.handler is not None:
+            self.handler(**kwargs)
+        # Raw model stream events arrive as `event`; the usage is in the final metadata event
+        metadata = (kwargs.get("event") or {}).get("metadata")
+        if metadata and "usage" in metadata:
+            self.record(metadata["usage"])
+
+    def record(self, usage):
+        """Add the `usage` dict of one model call"""
+        call = {name: usage.get(field, 0) for field, name in USAGE_FIELDS.items()}
+        with self._lock:
+            self.calls += 1
+            for name, tokens in call.items():
+                self.totals[name] += tokens
+            self.last_call = call
+        if self.parent is not None:
+            self.parent.record(usage)
+
+    def stats(self):
+        with self._lock:
+            totals = dict(self.totals)
+            calls = self.calls
+            last_call = dict(self.last_call) if self.last_call else None
+        prompt_tokens = totals["input_tokens"] + totals["cache_read_tokens"] + totals["cache_write_tokens"]
+        return {
+            "calls": calls,
+            **totals,
+            # Share of all prompt tokens that were read from the cache
+            "cache_hit_ratio": round(totals["cache_read_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0,
+            "last_call": last_call,
+        }
+
+    def format_summary(self):
+        stats = self.stats()
+        return (
+            f"Prompt cache: {stats['cache_read_tokens']} tokens read, {stats['cache_write_tokens']} written, "
+            f"{stats['input_tokens']} uncached input over {stats['calls']} model calls "
+            f"({stats['cache_hit_ratio']:.0%} of prompt tokens from the cache)"
+        )
@@ -0,0 +1,290 @@
+"""
+Sentence-pipelined text-to-speech with an on-disk audio cache.
+
+`speak` in strands_tools synthesizes the whole answer with Polly before
+playing anything. `SpeechPipeline` instead splits the text into sentences,
+synthesizes them on a small thread pool and starts playing the first one as
+soon as it is ready, while the following sentences are still being
+synthesized. Every synthesized segment is cached in `audio_cache/`, keyed by a
+hash of the text and voice, so repeated answers are never synthesized twice.
+The cache is capped at `SPEECH_CACHE_MAX_MB` megabytes (default 256), and
+the least recently used segments are deleted first.
+
+The `speak` tool defined here is a drop-in replacement for the strands_tools
+one and can be given to any agent; the summary-speak demo and the voice RAG
+notebook both use it.
+"""
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from strands import tool
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_cache")
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv("SPEECH_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Sentences are grouped into segments of up to this many characters, except
+# for the first segment, which is kept to one sentence to start playback early
+MAX_SEGMENT_CHARS = 400
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:])\s+")
+_HEADING = re.compile(r"^(#+.*?)[.!?:]?\s*$", re.MULTILINE)
+_MARKDOWN = re.compile(r"[#*_`>|]+|\[([^\]]*)\]\([^)]*\)")
+
+
+def split_sentences(text, max_chars=MAX_SEGMENT_CHARS):
+    """Split text into speakable segments, dropping Markdown markup."""
+    text = _HEADING.sub(r"\1.", text)
+    text = _MARKDOWN.sub(lambda m: m.group(1) or " ", text)
+    sentences = [s for s in _SENTENCE_SPLIT.split(" ".join(text.split())) if s.strip()]
+    if not sentences:
+        return []
+
+    segments = [sentences[0]]
+    current = ""
+    for sentence in sentences[1:]:
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+class PollySynthesizer:
+    """Synthesize speech with Amazon Polly, returning the encoded audio bytes."""
+
+    def __init__(self, voice_id="Joanna", engine="neural", output_format="mp3", region_name="us-west-2", client=None):
+        self.voice_id = voice_id
+        self.engine = engine
+        self.output_format = output_format
+        self.region_name = region_name
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def voice(self):
+        """Everything besides the text that changes the audio, used in cache keys."""
+        return f"polly:{self.engine}:{self.voice_id}"
+
+    @property
+    def suffix(self):
+        return "." + self.output_format
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import boto3
+
+                self._client = boto3.client("polly", region_name=self.region_name)
+            return self._client
+
+    def __call__(self, text):
+        response = self.client.synthesize_speech(
+            Engine=self.engine, OutputFormat=self.output_format, Text=text, VoiceId=self.voice_id
+        )
+        return response["AudioStream"].read()
+
+
+class AudioCache:
+    """
+    Size-bounded store of synthesized segments on disk as `<sha256(voice, text)><suffix>`.
+
+    When the total size exceeds `max_bytes` the least recently used segments
+    are deleted. File modification times carry the LRU order across restarts.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def path(self, text, voice, suffix):
+        digest = hashlib.sha256(f"{voice}\x00{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + suffix)
+
+    def get_or_create(self, text, synthesizer):
+        """Return the cached audio file for `text`, synthesizing it on a miss."""
+        path = self.path(text, synthesizer.voice, synthesizer.suffix)
+        with self._lock:
+            if path in self._entries and os.path.exists(path):
+                self._entries.move_to_end(path)
+                os.utime(path)
+                self.hits += 1
+                return path
+            self.misses += 1
+        audio = synthesizer(text)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._bytes += len(audio) - self._entries.pop(path, 0)
+            self._entries[path] = len(audio)
+            self._evict()
+        return path
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        # The newest segment is always kept, it may be about to play
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def find_player():
+    """Command line for a blocking audio player available on this machine."""
+    if sys.platform == "darwin":
+        return ["afplay"]
+    for command in (["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"], ["mpg123", "-q"]):
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+def play_file(path):
+    player = find_player()
+    if player is None:
+        raise RuntimeError("No audio player found, install ffmpeg (ffplay) or mpg123")
+    subprocess.run(player + [path], check=True)
+
+
+class SpeechPipeline:
+    """
+    Synthesize sentence segments ahead of playback.
+
+    Up to `lookahead` segments are synthesized (on `max_workers` threads)
+    while the current one plays. `player(path)` must block until the segment
+    has finished playing.
+    """
+
+    def __init__(self, synthesizer=None, cache=None, player=play_file, max_workers=2, lookahead=3):
+        self.synthesizer = synthesizer or PollySynthesizer()
+        self.cache = cache or AudioCache()
+        self.player = player
+        self.max_workers = max_workers
+        self.lookahead = max(1, lookahead)
+
+    def speak(self, text, play_audio=True, output_path=None):
+        """
+        Speak `text` and return timing stats.
+
+        With `output_path` the segments are also joined into one audio file
+        (MP3 frames can be concatenated as they are).
+        """
+        start = time.perf_counter()
+        segments = split_sentences(text)
+        stats = {"segments": len(segments), "time_to_first_audio": None}
+        hits = self.cache.hits
+        paths = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            remaining = iter(segments)
+
+            def fill():
+                while len(pending) < self.lookahead:
+                    segment = next(remaining, None)
+                    if segment is None:
+                        return
+                    pending.append(executor.submit(self.cache.get_or_create, segment, self.synthesizer))
+
+            fill()
+            while pending:
+                path = pending.popleft().result()
+                fill()
+                paths.append(path)
+                if stats["time_to_first_audio"] is None:
+                    stats["time_to_first_audio"] = round(time.perf_counter() - start, 3)
+                if play_audio:
+                    self.player(path)
+
+        if output_path:
+            with open(output_path, "wb") as output:
+                for path in paths:
+                    with open(path, "rb") as segment:
+                        shutil.copyfileobj(segment, output)
+
+        stats["cache_hits"] = self.cache.hits - hits
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        return stats
+
+
+_default_pipeline = None
+_default_lock = threading.Lock()
+
+
+def default_pipeline():
+    global _default_pipeline
+    with _default_lock:
+        if _default_pipeline is None:
+            _default_pipeline = SpeechPipeline()
+        return _default_pipeline
+
+
+@tool
+def speak(text: str, play_audio: bool = True, output_path: str = "speech_output.mp3") -> str:
+    """
+    Speak a message to the user with a natural voice (Amazon Polly).
+
+    Playback starts after the first sentence is synthesized, and previously
+    spoken sentences are replayed from a local cache.
+
+    Args:
+        text: The text to convert to speech.
+        play_audio: Whether to play the audio through speakers, or only save it.
+        output_path: Where to save the complete audio file.
+    """
+    stats = default_pipeline().speak(text, play_audio=play_audio, output_path=output_path)
+    return (
+        f"Spoke {stats['segments']} segments (saved to {output_path}); first audio after "
+        f"{stats['time_to_first_audio']}s, {stats['cache_hits']} from cache"
+    )
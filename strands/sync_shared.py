@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Copy the shared modules of `strands/` into the demos that are deployed on
+their own.
+
+`bedrock-agent-core/demo-deploying-strands` is packaged from its own
+directory by `agentcore launch`, so it ships copies of the shared modules
+instead of importing them from here. The files in `strands/` are the source;
+run this before deploying (and after editing a shared module) to refresh the
+copies, or with `--check` to fail when a copy differs:
+
+    python strands/sync_shared.py            # copy the shared modules
+    python strands/sync_shared.py --check    # exit 1 if a copy is out of date
+"""
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+STRANDS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(STRANDS_DIR)
+
+SHARED_MODULES = (
+    "conversation_memory.py",
+    "instrumentation.py",
+    "prompt_cache.py",
+    "token_count.py",
+)
+
+TARGET_DIRS = (os.path.join(ROOT, "bedrock-agent-core", "demo-deploying-strands"),)
+
+
+def stale_copies():
+    """(source, copy) paths of every copy that is missing or differs from its source"""
+    stale = []
+    for target in TARGET_DIRS:
+        for name in SHARED_MODULES:
+            source, copy = os.path.join(STRANDS_DIR, name), os.path.join(target, name)
+            if not os.path.exists(copy) or not filecmp.cmp(source, copy, shallow=False):
+                stale.append((source, copy))
+    return stale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Only report copies that differ from strands/ and exit 1 if any do")
+    args = parser.parse_args(argv)
+
+    stale = stale_copies()
+    for source, copy in stale:
+        if args.check:
+            print(f"{os.path.relpath(copy, ROOT)} differs from {os.path.relpath(source, ROOT)}")
+        else:
+            shutil.copy2(source, copy)
+            print(f"copied {os.path.relpath(source, ROOT)} -> {os.path.relpath(copy, ROOT)}")
+    return 1 if args.check and stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
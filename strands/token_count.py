@@ -0,0 +1,14 @@
+"""
+Rough token counts for budgeting prompts and conversation history.
+
+Text is counted at `CHARS_PER_TOKEN` characters per token, which is close
+enough for English prose and JSON to bound prompt sizes without loading a
+tokenizer.
+"""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Estimated tokens of `text`, rounded up"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN